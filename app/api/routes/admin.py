@@ -9,14 +9,32 @@ from sqlalchemy import select, func, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.cache import FEED_NAMESPACES, response_cache, schedule_invalidation
+from app.core.database import compiled_cache_stats, get_db, get_read_db, read_router
 from app.core.deps import get_admin_user
+from app.core.login_throttle import login_throttle
+from app.core.security import password_hasher
 from app.core.timezone import now_beijing, BEIJING_TZ
+from app.core.write_queue import write_queue
 from app.models.user import User
 from app.models.post import Post
 from app.models.comment import Comment
 from app.schemas.site import BatchDeleteRequest
 from app.schemas.common import success_response
+from app.services.authors import author_cache
+from app.services.counters import adjust_post_counters, recount_posts
+from app.services.principals import Principal, principal_cache
+from app.services.search import build_match_query, is_fts_enabled, matched_post_ids
+from app.services.timeline import remove_posts_from_timelines
+from app.services.totals import (
+    COMMENTS,
+    POSTS,
+    USERS,
+    adjust_total,
+    approximate_total,
+    get_total,
+    release_post_totals,
+)
 
 router = APIRouter(prefix="/admin", tags=["管理员"])
 
@@ -25,7 +43,7 @@ router = APIRouter(prefix="/admin", tags=["管理员"])
 async def delete_post(
     post_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)]
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
 ):
     """删除帖子"""
     result = await db.execute(select(Post).where(Post.id == post_id))
@@ -37,7 +55,10 @@ async def delete_post(
             detail="帖子不存在"
         )
     
+    await remove_posts_from_timelines(db, [post_id])
+    await release_post_totals(db, [post])
     await db.delete(post)
+    schedule_invalidation(db, *FEED_NAMESPACES, "stats")
     
     return success_response(message="帖子删除成功")
 
@@ -46,7 +67,7 @@ async def delete_post(
 async def delete_comment(
     comment_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)]
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
 ):
     """删除评论"""
     result = await db.execute(select(Comment).where(Comment.id == comment_id))
@@ -59,14 +80,15 @@ async def delete_comment(
         )
     
     await db.delete(comment)
+    await adjust_post_counters(db, comment.post_id, comments=-1)
     
     return success_response(message="评论删除成功")
 
 
 @router.get("/posts")
 async def get_all_posts(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    admin_user: Annotated[Principal, Depends(get_admin_user)],
     page: int = Query(1, ge=1),
     pageSize: int = Query(20, ge=1, le=100),
     sortBy: str = Query("latest", pattern="^(latest|oldest|mostLiked|mostCommented)$"),
@@ -76,21 +98,20 @@ async def get_all_posts(
     offset = (page - 1) * pageSize
     
     # 构建查询
-    query = select(Post).options(
-        selectinload(Post.author),
-        selectinload(Post.likes),
-        selectinload(Post.comments).selectinload(Comment.author),
-        selectinload(Post.comments).selectinload(Comment.likes)
-    )
+    query = select(Post).options(selectinload(Post.author))
     
-    # 搜索
+    # 搜索（优先使用全文索引）
+    search_filter = None
     if search:
-        query = query.where(
-            or_(
+        match_query = build_match_query(search) if is_fts_enabled() else None
+        if match_query:
+            search_filter = Post.id.in_(matched_post_ids(match_query))
+        else:
+            search_filter = or_(
                 Post.title.ilike(f"%{search}%"),
                 Post.content.ilike(f"%{search}%")
             )
-        )
+        query = query.where(search_filter)
     
     # 排序
     if sortBy == "latest":
@@ -98,31 +119,53 @@ async def get_all_posts(
     elif sortBy == "oldest":
         query = query.order_by(Post.created_at.asc())
     elif sortBy == "mostLiked":
-        # 按点赞数排序需要子查询
-        query = query.order_by(Post.view_count.desc())  # 简化实现
+        query = query.order_by(Post.like_count.desc(), Post.created_at.desc())
     elif sortBy == "mostCommented":
-        query = query.order_by(Post.view_count.desc())  # 简化实现
+        query = query.order_by(Post.comment_count.desc(), Post.created_at.desc())
     
-    query = query.offset(offset).limit(pageSize)
+    # 多取一条判断是否还有下一页
+    query = query.offset(offset).limit(pageSize + 1)
     result = await db.execute(query)
     posts = result.scalars().all()
+    has_more = len(posts) > pageSize
+    posts = posts[:pageSize]
     
     # 统计总数
-    count_query = select(func.count(Post.id))
-    if search:
-        count_query = count_query.where(
-            or_(
-                Post.title.ilike(f"%{search}%"),
-                Post.content.ilike(f"%{search}%")
+    if search_filter is not None:
+        total = await approximate_total(
+            db, f"admin:posts:{search}", select(func.count(Post.id)).where(search_filter)
+        )
+    else:
+        total = await get_total(db, POSTS, select(func.count(Post.id)))
+    
+    # 每个帖子只取前5条评论
+    preview_comments: dict[int, list[Comment]] = {post.id: [] for post in posts}
+    if posts:
+        ranked = (
+            select(
+                Comment.id,
+                func.row_number().over(
+                    partition_by=Comment.post_id,
+                    order_by=Comment.id
+                ).label("rn")
             )
+            .where(Comment.post_id.in_(list(preview_comments)))
+            .subquery()
         )
-    count_result = await db.execute(count_query)
-    total = count_result.scalar() or 0
+        comments_result = await db.execute(
+            select(Comment)
+            .options(selectinload(Comment.author))
+            .join(ranked, ranked.c.id == Comment.id)
+            .where(ranked.c.rn <= 5)
+            .order_by(Comment.id)
+        )
+        for comment in comments_result.scalars().all():
+            preview_comments[comment.post_id].append(comment)
     
     items = []
     for post in posts:
         comments = []
-        for comment in post.comments[:5]:  # 只返回前5条评论
+        for comment in preview_comments[post.id]:
             comments.append({
                 "id": comment.id,
                 "postId": comment.post_id,
@@ -132,7 +175,7 @@ async def get_all_posts(
                     "username": comment.author.username,
                     "avatar": comment.author.get_avatar_url()
                 },
-                "likes": len(comment.likes),
+                "likes": comment.like_count,
                 "createdAt": comment.created_at.isoformat()
             })
         
@@ -145,8 +188,8 @@ async def get_all_posts(
                 "username": post.author.username,
                 "avatar": post.author.get_avatar_url()
             },
-            "likes": len(post.likes),
-            "commentCount": len(post.comments),
+            "likes": post.like_count,
+            "commentCount": post.comment_count,
             "viewCount": post.view_count,
             "createdAt": post.created_at.isoformat(),
             "comments": comments
@@ -157,15 +200,16 @@ async def get_all_posts(
             "items": items,
             "total": total,
             "page": page,
-            "pageSize": pageSize
+            "pageSize": pageSize,
+            "hasMore": has_more
         }
     )
 
 
 @router.get("/comments")
 async def get_all_comments(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    admin_user: Annotated[Principal, Depends(get_admin_user)],
     page: int = Query(1, ge=1),
     pageSize: int = Query(20, ge=1, le=100),
     sortBy: str = Query("latest", pattern="^(latest|oldest)$"),
@@ -174,10 +218,7 @@ async def get_all_comments(
     """获取所有评论（管理员）"""
     offset = (page - 1) * pageSize
     
-    query = select(Comment).options(
-        selectinload(Comment.author),
-        selectinload(Comment.likes)
-    )
+    query = select(Comment).options(selectinload(Comment.author))
     
     # 搜索
     if search:
@@ -189,16 +230,22 @@ async def get_all_comments(
     else:
         query = query.order_by(Comment.created_at.asc())
     
-    query = query.offset(offset).limit(pageSize)
+    # 多取一条判断是否还有下一页
+    query = query.offset(offset).limit(pageSize + 1)
     result = await db.execute(query)
     comments = result.scalars().all()
+    has_more = len(comments) > pageSize
+    comments = comments[:pageSize]
     
     # 统计总数
-    count_query = select(func.count(Comment.id))
     if search:
-        count_query = count_query.where(Comment.content.ilike(f"%{search}%"))
-    count_result = await db.execute(count_query)
-    total = count_result.scalar() or 0
+        total = await approximate_total(
+            db,
+            f"admin:comments:{search}",
+            select(func.count(Comment.id)).where(Comment.content.ilike(f"%{search}%"))
+        )
+    else:
+        total = await get_total(db, COMMENTS, select(func.count(Comment.id)))
     
     items = []
     for comment in comments:
@@ -211,7 +258,7 @@ async def get_all_comments(
                 "username": comment.author.username,
                 "avatar": comment.author.get_avatar_url()
             },
-            "likes": len(comment.likes),
+            "likes": comment.like_count,
             "createdAt": comment.created_at.isoformat()
         })
     
@@ -220,28 +267,22 @@ async def get_all_comments(
             "items": items,
             "total": total,
             "page": page,
-            "pageSize": pageSize
+            "pageSize": pageSize,
+            "hasMore": has_more
         }
     )
 
 
 @router.get("/stats")
 async def get_admin_stats(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
 ):
     """获取管理员统计数据"""
-    # 总帖子数
-    total_posts_result = await db.execute(select(func.count(Post.id)))
-    total_posts = total_posts_result.scalar() or 0
-    
-    # 总评论数
-    total_comments_result = await db.execute(select(func.count(Comment.id)))
-    total_comments = total_comments_result.scalar() or 0
-    
-    # 总用户数
-    total_users_result = await db.execute(select(func.count(User.id)))
-    total_users = total_users_result.scalar() or 0
+    # 总帖子数、总评论数、总用户数
+    total_posts = await get_total(db, POSTS, select(func.count(Post.id)))
+    total_comments = await get_total(db, COMMENTS, select(func.count(Comment.id)))
+    total_users = await get_total(db, USERS, select(func.count(User.id)))
     
     # 今日统计
     today = now_beijing().date()
@@ -272,11 +313,65 @@ async def get_admin_stats(
     )
 
 
+@router.get("/cache/stats")
+async def get_cache_stats(
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
+):
+    """获取响应缓存、作者摘要缓存和登录身份缓存命中统计"""
+    return success_response(
+        data={
+            **response_cache.stats(),
+            "authors": author_cache.stats(),
+            "principals": principal_cache.stats(),
+        }
+    )
+
+
+@router.get("/write-queue/stats")
+async def get_write_queue_stats(
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
+):
+    """获取写入队列批次大小和排队时间统计"""
+    return success_response(data=write_queue.stats())
+
+
+@router.get("/db/replicas")
+async def get_replica_stats(
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
+):
+    """获取只读副本健康状态和读请求路由统计"""
+    return success_response(data=read_router.stats())
+
+
+@router.get("/db/query-cache")
+async def get_query_cache_stats(
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
+):
+    """获取 SQL 编译缓存命中统计"""
+    return success_response(data=compiled_cache_stats.stats())
+
+
+@router.get("/password-hasher/stats")
+async def get_password_hasher_stats(
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
+):
+    """获取密码哈希线程池排队深度和耗时统计"""
+    return success_response(data=password_hasher.stats())
+
+
+@router.get("/login-throttle/stats")
+async def get_login_throttle_stats(
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
+):
+    """获取登录限流的失败、锁定和拒绝次数"""
+    return success_response(data=login_throttle.stats())
+
+
 @router.delete("/posts/batch")
 async def batch_delete_posts(
     data: BatchDeleteRequest,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)]
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
 ):
     """批量删除帖子"""
     if not data.postIds:
@@ -288,10 +383,14 @@ async def batch_delete_posts(
     result = await db.execute(select(Post).where(Post.id.in_(data.postIds)))
     posts = result.scalars().all()
     
+    await remove_posts_from_timelines(db, [post.id for post in posts])
+    await release_post_totals(db, posts)
+    
     deleted_count = 0
     for post in posts:
         await db.delete(post)
         deleted_count += 1
+    schedule_invalidation(db, *FEED_NAMESPACES, "stats")
     
     return success_response(
         data={"deletedCount": deleted_count},
@@ -303,7 +402,7 @@ async def batch_delete_posts(
 async def batch_delete_comments(
     data: BatchDeleteRequest,
     db: Annotated[AsyncSession, Depends(get_db)],
-    admin_user: Annotated[User, Depends(get_admin_user)]
+    admin_user: Annotated[Principal, Depends(get_admin_user)]
 ):
     """批量删除评论"""
     if not data.commentIds:
@@ -316,10 +415,16 @@ async def batch_delete_comments(
     comments = result.scalars().all()
     
     deleted_count = 0
+    affected_post_ids = set()
     for comment in comments:
+        affected_post_ids.add(comment.post_id)
         await db.delete(comment)
         deleted_count += 1
     
+    await db.flush()
+    await recount_posts(db, affected_post_ids)
+    await adjust_total(db, COMMENTS, -deleted_count)
+    
     return success_response(
         data={"deletedCount": deleted_count},
         message="批量删除成功"
@@ -3,16 +3,20 @@
 """
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import schedule_invalidation
 from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.login_throttle import login_throttle
+from app.core.security import create_access_token, password_hasher
 from app.core.deps import get_current_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, AuthResponse
 from app.schemas.common import success_response
+from app.services.principals import Principal
+from app.services.totals import USERS, adjust_total
 
 router = APIRouter(prefix="/auth", tags=["认证"])
 
@@ -43,13 +47,15 @@ async def register(
     new_user = User(
         username=user_data.username,
         email=user_data.email,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await password_hasher.hash(user_data.password),
         avatar=f"https://api.dicebear.com/7.x/avataaars/svg?seed={user_data.username}"
     )
     
     db.add(new_user)
     await db.flush()
     await db.refresh(new_user)
+    await adjust_total(db, USERS, 1)
+    schedule_invalidation(db, "stats")
     
     return success_response(
         data={
@@ -69,18 +75,33 @@ async def register(
 @router.post("/login")
 async def login(
     login_data: UserLogin,
+    request: Request,
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     """用户登录"""
-    # 查找用户
-    result = await db.execute(select(User).where(User.username == login_data.username))
-    user = result.scalar_one_or_none()
-    
-    if not user or not verify_password(login_data.password, user.hashed_password):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="用户名或密码错误"
-        )
+    # 先为 IP / 用户名占用尝试名额，锁定中或并发过多时直接拒绝，不进行密码校验
+    client_ip = login_throttle.client_ip(request)
+    with login_throttle.attempt(client_ip, login_data.username) as attempt:
+        # 查找用户
+        result = await db.execute(select(User).where(User.username == login_data.username))
+        user = result.scalar_one_or_none()
+        
+        if not user:
+            attempt.fail()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="用户名或密码错误"
+            )
+        
+        valid, new_hash = await password_hasher.verify_and_update(login_data.password, user.hashed_password)
+        if not valid:
+            attempt.fail()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="用户名或密码错误"
+            )
+        
+        attempt.succeed()
     
     if not user.is_active:
         raise HTTPException(
@@ -88,6 +109,10 @@ async def login(
             detail="账号已被禁用"
         )
     
+    # BCRYPT_ROUNDS 调整后，按新成本重新保存哈希
+    if new_hash:
+        user.hashed_password = new_hash
+    
     # 生成token
     token = create_access_token(data={"sub": str(user.id)})
     
@@ -109,7 +134,7 @@ async def login(
 
 @router.get("/user")
 async def get_user_info(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     """获取当前用户信息"""
     return success_response(
@@ -126,7 +151,7 @@ async def get_user_info(
 
 @router.post("/logout")
 async def logout(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     """用户登出"""
     # JWT无状态，客户端删除token即可
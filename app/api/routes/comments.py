@@ -1,37 +1,139 @@
 """
 评论相关路由
 """
-from typing import Annotated
+from typing import Annotated, Optional
+from datetime import datetime
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import bindparam, select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
-from app.core.deps import get_current_user
-from app.models.user import User
+from app.core.database import add_unique, get_db, get_read_db
+from app.core.deps import get_current_user, get_current_user_optional
+from app.core.pagination import decode_cursor, keyset_before, keyset_after, split_page
+from app.core.responses import json_response
+from app.core.write_queue import write_queue
 from app.models.post import Post
 from app.models.comment import Comment, CommentLike
 from app.schemas.comment import CommentCreate
 from app.schemas.common import success_response
+from app.services.counters import adjust_post_counters, adjust_comment_likes
+from app.services.principals import Principal
+from app.services.viewer_state import ViewerState, EMPTY_VIEWER_STATE, load_viewer_state
 
 router = APIRouter(tags=["评论"])
 
+# 评论排序方式
+COMMENT_SORT_PATTERN = "^(newest|oldest|mostLiked)$"
 
-@router.post("/posts/{post_id}/comments")
-async def create_comment(
+# 评论点赞切换中的查询（预构建语句，每次只绑定参数）
+_COMMENT_EXISTS = select(Comment.id).where(Comment.id == bindparam("comment_id"))
+_COMMENT_LIKE = select(CommentLike).where(
+    CommentLike.comment_id == bindparam("comment_id"),
+    CommentLike.user_id == bindparam("user_id")
+)
+
+
+def format_comment(comment: Comment, viewer: ViewerState = EMPTY_VIEWER_STATE) -> dict:
+    """格式化评论响应"""
+    return {
+        "id": comment.id,
+        "postId": comment.post_id,
+        "content": comment.content,
+        "author": {
+            "id": comment.author.id,
+            "username": comment.author.username,
+            "email": comment.author.email,
+            "avatar": comment.author.get_avatar_url(),
+            "createdAt": comment.author.created_at
+        },
+        "likes": comment.like_count,
+        "isLiked": viewer.is_comment_liked(comment.id),
+        "createdAt": comment.created_at
+    }
+
+
+async def fetch_comment_page(
+    db: AsyncSession,
     post_id: int,
-    comment_data: CommentCreate,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    sort: str = "oldest",
+    limit: int = 20,
+    cursor: Optional[str] = None
+) -> tuple[list[Comment], Optional[str]]:
+    """按游标读取帖子的一页评论，返回 (评论列表, 下一页游标)"""
+    query = (
+        select(Comment)
+        .options(selectinload(Comment.author))
+        .where(Comment.post_id == post_id)
+    )
+    
+    if sort == "mostLiked":
+        query = query.order_by(Comment.like_count.desc(), Comment.id.desc())
+        if cursor:
+            query = query.where(
+                keyset_before((Comment.like_count, Comment.id), decode_cursor(cursor, int, int))
+            )
+        key = lambda comment: (comment.like_count, comment.id)
+    elif sort == "newest":
+        query = query.order_by(Comment.created_at.desc(), Comment.id.desc())
+        if cursor:
+            query = query.where(
+                keyset_before((Comment.created_at, Comment.id), decode_cursor(cursor, datetime, int))
+            )
+        key = lambda comment: (comment.created_at, comment.id)
+    else:
+        query = query.order_by(Comment.created_at.asc(), Comment.id.asc())
+        if cursor:
+            query = query.where(
+                keyset_after((Comment.created_at, Comment.id), decode_cursor(cursor, datetime, int))
+            )
+        key = lambda comment: (comment.created_at, comment.id)
+    
+    result = await db.execute(query.limit(limit + 1))
+    return split_page(result.scalars().all(), limit, key)
+
+
+@router.get("/posts/{post_id}/comments")
+async def get_post_comments(
+    post_id: int,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
+    sort: str = Query("oldest", pattern=COMMENT_SORT_PATTERN),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标")
 ):
-    """创建评论"""
-    # 检查帖子是否存在
-    result = await db.execute(select(Post).where(Post.id == post_id))
-    post = result.scalar_one_or_none()
+    """分页获取帖子评论"""
+    result = await db.execute(select(Post.id).where(Post.id == post_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="帖子不存在"
+        )
+    
+    comments, next_cursor = await fetch_comment_page(db, post_id, sort, limit, cursor)
+    viewer = await load_viewer_state(
+        db, current_user, comment_ids=[comment.id for comment in comments]
+    )
     
-    if not post:
+    return json_response(
+        success_response(
+            data={
+                "items": [format_comment(comment, viewer) for comment in comments],
+                "sort": sort,
+                "limit": limit,
+                "hasMore": next_cursor is not None,
+                "nextCursor": next_cursor
+            }
+        )
+    )
+
+
+async def add_comment(db: AsyncSession, post_id: int, content: str, author: Principal) -> dict:
+    """写入评论并更新计数（在写入队列的批次事务中执行）"""
+    # 检查帖子是否存在
+    result = await db.execute(select(Post.id).where(Post.id == post_id))
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="帖子不存在"
@@ -39,12 +141,13 @@ async def create_comment(
     
     # 创建评论
     new_comment = Comment(
-        content=comment_data.content,
-        author_id=current_user.id,
+        content=content,
+        author_id=author.id,
         post_id=post_id
     )
     
     db.add(new_comment)
+    await adjust_post_counters(db, post_id, comments=1)
     await db.flush()
     await db.refresh(new_comment)
     
@@ -54,11 +157,11 @@ async def create_comment(
             "postId": post_id,
             "content": new_comment.content,
             "author": {
-                "id": current_user.id,
-                "username": current_user.username,
-                "email": current_user.email,
-                "avatar": current_user.get_avatar_url(),
-                "createdAt": current_user.created_at.isoformat()
+                "id": author.id,
+                "username": author.username,
+                "email": author.email,
+                "avatar": author.get_avatar_url(),
+                "createdAt": author.created_at.isoformat()
             },
             "likes": 0,
             "isLiked": False,
@@ -68,50 +171,63 @@ async def create_comment(
     )
 
 
-@router.post("/comments/{comment_id}/like")
-async def like_comment(
-    comment_id: int,
+@router.post("/posts/{post_id}/comments")
+async def create_comment(
+    post_id: int,
+    comment_data: CommentCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
-    """点赞/取消点赞评论"""
+    """创建评论"""
+    return await write_queue.run(
+        db, lambda session: add_comment(session, post_id, comment_data.content, current_user)
+    )
+
+
+async def toggle_comment_like(db: AsyncSession, comment_id: int, user_id: int) -> dict:
+    """切换评论点赞状态（在写入队列的批次事务中执行）"""
     # 检查评论是否存在
-    result = await db.execute(select(Comment).where(Comment.id == comment_id))
-    comment = result.scalar_one_or_none()
-    
-    if not comment:
+    result = await db.execute(_COMMENT_EXISTS, {"comment_id": comment_id})
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="评论不存在"
         )
     
     # 检查是否已点赞
-    result = await db.execute(
-        select(CommentLike).where(
-            CommentLike.comment_id == comment_id,
-            CommentLike.user_id == current_user.id
-        )
-    )
+    result = await db.execute(_COMMENT_LIKE, {"comment_id": comment_id, "user_id": user_id})
     existing_like = result.scalar_one_or_none()
     
     if existing_like:
         # 取消点赞
         await db.delete(existing_like)
+        await adjust_comment_likes(db, comment_id, -1)
         message = "取消点赞成功"
     else:
-        # 点赞
-        new_like = CommentLike(comment_id=comment_id, user_id=current_user.id)
-        db.add(new_like)
+        # 点赞（唯一索引防止并发请求重复点赞）
+        if await add_unique(db, CommentLike(comment_id=comment_id, user_id=user_id)):
+            await adjust_comment_likes(db, comment_id, 1)
         message = "点赞成功"
     
     return success_response(message=message)
 
 
+@router.post("/comments/{comment_id}/like")
+async def like_comment(
+    comment_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
+):
+    """点赞/取消点赞评论"""
+    user_id = current_user.id
+    return await write_queue.run(db, lambda session: toggle_comment_like(session, comment_id, user_id))
+
+
 @router.delete("/comments/{comment_id}")
 async def delete_comment(
     comment_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     """删除评论"""
     # 查询评论
@@ -132,10 +248,10 @@ async def delete_comment(
         )
     
     # 删除评论的点赞记录
-    from sqlalchemy import delete
     await db.execute(delete(CommentLike).where(CommentLike.comment_id == comment_id))
     
     # 删除评论
     await db.delete(comment)
+    await adjust_post_counters(db, comment.post_id, comments=-1)
     
     return success_response(message="删除成功")
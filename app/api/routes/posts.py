@@ -3,272 +3,521 @@
 """
 from typing import Annotated, Optional
 from datetime import datetime
+from functools import lru_cache
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func, desc
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import Integer, bindparam, select, func, desc, delete
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload, defer
 
-from app.core.database import get_db
+from app.core.cache import FEED_NAMESPACES, response_cache, schedule_invalidation
+from app.core.database import add_unique, get_db, get_read_db
+from app.core.etag import etag_matches, feed_etag, make_etag, not_modified
 from app.core.deps import get_current_user, get_current_user_optional
+from app.core.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_before,
+    keyset_after,
+    split_page,
+)
+from app.core.responses import json_response
 from app.core.timezone import now_beijing
+from app.core.write_queue import write_queue
+from app.api.routes.comments import fetch_comment_page, format_comment
 from app.models.user import User
 from app.models.post import Post, PostLike, PostFavorite
-from app.models.comment import Comment
+from app.models.comment import Comment, CommentLike
 from app.schemas.post import PostCreate, PostUpdate
 from app.schemas.common import success_response
+from app.services.authors import author_cache, author_summary
+from app.services.counters import adjust_post_counters
+from app.services.principals import Principal
+from app.services.recommend import default_seed, sample_posts
+from app.services.search import (
+    SNIPPET_RADIUS,
+    build_match_query,
+    count_matches_query,
+    highlight,
+    index_post,
+    is_fts_enabled,
+    ranked_matches_query,
+)
+from app.services.timeline import (
+    fetch_timeline_page,
+    remove_posts_from_timelines,
+    timeline_fanout,
+)
+from app.services.totals import (
+    POSTS,
+    adjust_total,
+    approximate_total,
+    author_posts_key,
+    get_total,
+    release_post_totals,
+    user_favorites_key,
+)
+from app.services.view_counter import view_buffer
+from app.services.viewer_state import ViewerState, EMPTY_VIEWER_STATE, load_viewer_state
 
 router = APIRouter(prefix="/posts", tags=["帖子"])
 
+# 帖子详情中内嵌的评论条数，其余通过 GET /posts/{id}/comments 分页获取
+DETAIL_COMMENT_LIMIT = 20
 
-def format_post(post: Post, current_user: Optional[User] = None) -> dict:
-    """格式化帖子响应"""
-    is_liked = False
-    if current_user:
-        is_liked = any(like.user_id == current_user.id for like in post.likes)
-    
-    return {
+# 点赞/收藏切换中的查询（预构建语句，每次只绑定参数）
+_POST_EXISTS = select(Post.id).where(Post.id == bindparam("post_id"))
+_POST_LIKE = select(PostLike).where(
+    PostLike.post_id == bindparam("post_id"),
+    PostLike.user_id == bindparam("user_id")
+)
+_POST_FAVORITE = select(PostFavorite).where(
+    PostFavorite.post_id == bindparam("post_id"),
+    PostFavorite.user_id == bindparam("user_id")
+)
+
+
+def content_options(full: bool) -> list:
+    """列表查询的加载选项：只返回摘要时不从数据库读取 content 列"""
+    return [] if full else [defer(Post.content, raiseload=True)]
+
+
+@lru_cache(maxsize=None)
+def latest_posts_statement(full: bool, keyset: bool):
+    """最新帖子列表的预构建查询，分页参数（limit、offset 或游标）通过 bindparam 传入"""
+    query = (
+        select(Post)
+        .options(*content_options(full))
+        .order_by(desc(Post.created_at), desc(Post.id))
+    )
+    if keyset:
+        query = query.where(
+            keyset_before(
+                (Post.created_at, Post.id),
+                (
+                    bindparam("before_created_at", type_=Post.created_at.type),
+                    bindparam("before_id", type_=Integer)
+                )
+            )
+        )
+    else:
+        query = query.offset(bindparam("offset", type_=Integer))
+    return query.limit(bindparam("limit", type_=Integer))
+
+
+async def format_posts(
+    db: AsyncSession,
+    posts: list[Post],
+    current_user: Optional[Principal] = None,
+    full: bool = True
+) -> list[dict]:
+    """批量格式化帖子列表（互动状态批量查询，作者信息取自摘要缓存，无需预加载 Post.author）"""
+    viewer = await load_viewer_state(db, current_user, post_ids=[post.id for post in posts])
+    authors = await author_cache.get_many(db, [post.author_id for post in posts])
+    return [format_post(post, viewer, authors[post.author_id], full) for post in posts]
+
+
+def format_post(
+    post: Post,
+    viewer: ViewerState = EMPTY_VIEWER_STATE,
+    author: Optional[dict] = None,
+    full: bool = True
+) -> dict:
+    """格式化帖子响应（author 为空时使用已加载的 Post.author；full 为 False 时 content 返回摘要，不再重复返回 excerpt）"""
+    item = {
         "id": post.id,
         "title": post.title,
-        "content": post.content,
+        "content": post.content if full else post.excerpt,
         "images": post.images or [],
-        "author": {
-            "id": post.author.id,
-            "username": post.author.username,
-            "email": post.author.email,
-            "avatar": post.author.get_avatar_url(),
-            "createdAt": post.author.created_at.isoformat()
-        },
-        "likes": len(post.likes),
-        "commentCount": len(post.comments),
+        "author": author or author_summary(post.author),
+        "likes": post.like_count,
+        "commentCount": post.comment_count,
         "viewCount": post.view_count,
-        "isLiked": is_liked,
-        "createdAt": post.created_at.isoformat(),
-        "updatedAt": post.updated_at.isoformat(),
+        "isLiked": viewer.is_post_liked(post.id),
+        "isFavorited": viewer.is_post_favorited(post.id),
+        "createdAt": post.created_at,
+        "updatedAt": post.updated_at,
         "comments": []
     }
+    if full:
+        item["excerpt"] = post.excerpt
+    return item
 
 
-def format_post_detail(post: Post, current_user: Optional[User] = None) -> dict:
-    """格式化帖子详情响应（包含评论）"""
-    result = format_post(post, current_user)
-    
-    comments = []
-    for comment in post.comments:
-        is_comment_liked = False
-        if current_user:
-            is_comment_liked = any(like.user_id == current_user.id for like in comment.likes)
-        
-        comments.append({
-            "id": comment.id,
-            "postId": comment.post_id,
-            "content": comment.content,
-            "author": {
-                "id": comment.author.id,
-                "username": comment.author.username,
-                "email": comment.author.email,
-                "avatar": comment.author.get_avatar_url(),
-                "createdAt": comment.author.created_at.isoformat()
-            },
-            "likes": len(comment.likes),
-            "isLiked": is_comment_liked,
-            "createdAt": comment.created_at.isoformat()
-        })
-    
-    result["comments"] = comments
+def format_post_detail(
+    post: Post,
+    comments: list[Comment],
+    comments_cursor: Optional[str] = None,
+    viewer: ViewerState = EMPTY_VIEWER_STATE
+) -> dict:
+    """格式化帖子详情响应（包含第一页评论）"""
+    result = format_post(post, viewer)
+    result["viewCount"] = post.view_count + view_buffer.pending(post.id)
+    result["comments"] = [format_comment(comment, viewer) for comment in comments]
+    result["commentsCursor"] = comments_cursor
     return result
 
 
 @router.get("")
 async def get_posts(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标（优先于page）"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
 ):
     """获取帖子列表"""
-    offset = (page - 1) * limit
+    # 列表未变化时直接返回 304
+    etag = feed_etag(
+        "posts", current_user.id if current_user else None,
+        page=page, limit=limit, cursor=cursor, full=full
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # 匿名请求优先命中共享缓存
+    cache_key = response_cache.make_key("posts", page=page, limit=limit, cursor=cursor, full=full)
+    if current_user is None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            cached.headers["ETag"] = etag
+            return cached
     
     # 查询帖子
-    query = (
-        select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments)
-        )
-        .order_by(desc(Post.created_at))
-        .offset(offset)
-        .limit(limit)
+    if cursor:
+        before_created_at, before_id = decode_cursor(cursor, datetime, int)
+        params = {"before_created_at": before_created_at, "before_id": before_id}
+    else:
+        params = {"offset": (page - 1) * limit}
+    result = await db.execute(
+        latest_posts_statement(full, keyset=cursor is not None),
+        {**params, "limit": limit + 1}
+    )
+    posts, next_cursor = split_page(
+        result.scalars().all(), limit, lambda post: (post.created_at, post.id)
     )
-    result = await db.execute(query)
-    posts = result.scalars().all()
     
-    # 查询总数
-    count_query = select(func.count(Post.id))
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    total = await get_total(db, POSTS, select(func.count(Post.id)))
     
-    items = [format_post(post, current_user) for post in posts]
+    items = await format_posts(db, posts, current_user, full)
     
-    return success_response(
+    payload = success_response(
         data={
             "items": items,
             "total": total,
             "page": page,
             "limit": limit,
-            "hasMore": offset + len(items) < total
+            "hasMore": next_cursor is not None,
+            "nextCursor": next_cursor
         }
     )
+    if current_user is None:
+        return response_cache.store(cache_key, payload, headers={"ETag": etag})
+    return json_response(payload, headers={"ETag": etag})
 
 
 @router.get("/hot")
 async def get_hot_posts(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标（优先于page）"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
 ):
     """获取热门帖子"""
-    offset = (page - 1) * limit
-    
-    # 按点赞数+评论数排序
+    # 列表未变化时直接返回 304
+    etag = feed_etag(
+        "hot", current_user.id if current_user else None,
+        page=page, limit=limit, cursor=cursor, full=full
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # 匿名请求优先命中共享缓存
+    cache_key = response_cache.make_key("hot", page=page, limit=limit, cursor=cursor, full=full)
+    if current_user is None:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            cached.headers["ETag"] = etag
+            return cached
+    
+    # 按时间衰减热度分排序（由 hot_rank 服务维护）
     query = (
         select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments)
+        .options(*content_options(full))
+        .order_by(desc(Post.hot_score), desc(Post.id))
+    )
+    if cursor:
+        query = query.where(
+            keyset_before((Post.hot_score, Post.id), decode_cursor(cursor, float, int))
         )
-        .order_by(desc(Post.view_count))
-        .offset(offset)
-        .limit(limit)
+    else:
+        query = query.offset((page - 1) * limit)
+    result = await db.execute(query.limit(limit + 1))
+    posts, next_cursor = split_page(
+        result.scalars().all(), limit, lambda post: (post.hot_score, post.id)
     )
-    result = await db.execute(query)
-    posts = result.scalars().all()
     
-    count_query = select(func.count(Post.id))
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
+    total = await get_total(db, POSTS, select(func.count(Post.id)))
     
-    items = [format_post(post, current_user) for post in posts]
+    items = await format_posts(db, posts, current_user, full)
     
-    return success_response(
+    payload = success_response(
         data={
             "items": items,
             "total": total,
             "page": page,
             "limit": limit,
-            "hasMore": offset + len(items) < total
+            "hasMore": next_cursor is not None,
+            "nextCursor": next_cursor
         }
     )
+    if current_user is None:
+        return response_cache.store(cache_key, payload, headers={"ETag": etag})
+    return json_response(payload, headers={"ETag": etag})
 
 
 @router.get("/search")
 async def search_posts(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     keyword: str = Query(..., min_length=1, description="搜索关键词"),
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标（优先于page）"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
 ):
     """搜索帖子"""
-    offset = (page - 1) * limit
-    
-    # 搜索标题和内容
-    search_filter = Post.title.ilike(f"%{keyword}%") | Post.content.ilike(f"%{keyword}%")
-    
-    query = (
-        select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments)
+    match_query = build_match_query(keyword) if is_fts_enabled() else None
+    
+    if match_query:
+        # 全文索引，按BM25相关度排序
+        ranked = ranked_matches_query(match_query).subquery()
+        query = select(ranked.c.id, ranked.c.rank).order_by(ranked.c.rank, ranked.c.id)
+        if cursor:
+            query = query.where(
+                keyset_after((ranked.c.rank, ranked.c.id), decode_cursor(cursor, float, int))
+            )
+        else:
+            query = query.offset((page - 1) * limit)
+        result = await db.execute(query.limit(limit + 1))
+        matches, next_cursor = split_page(result.all(), limit, lambda row: (row.rank, row.id))
+        
+        # 高亮摘要需要在完整正文中定位关键词，搜索结果始终读取 content
+        posts_result = await db.execute(
+            select(Post).where(Post.id.in_([row.id for row in matches]))
+        )
+        posts_by_id = {post.id: post for post in posts_result.scalars().all()}
+        posts = [posts_by_id[row.id] for row in matches if row.id in posts_by_id]
+        
+        total = await approximate_total(
+            db, f"search:fts:{match_query}", count_matches_query(match_query)
+        )
+    else:
+        # 全文索引不可用时搜索标题和内容（PostgreSQL 下由 pg_trgm 索引加速）
+        search_filter = Post.title.ilike(f"%{keyword}%") | Post.content.ilike(f"%{keyword}%")
+        
+        query = (
+            select(Post)
+            .where(search_filter)
+            .order_by(desc(Post.created_at), desc(Post.id))
+        )
+        if cursor:
+            query = query.where(
+                keyset_before((Post.created_at, Post.id), decode_cursor(cursor, datetime, int))
+            )
+        else:
+            query = query.offset((page - 1) * limit)
+        result = await db.execute(query.limit(limit + 1))
+        posts, next_cursor = split_page(
+            result.scalars().all(), limit, lambda post: (post.created_at, post.id)
+        )
+        
+        total = await approximate_total(
+            db, f"search:like:{keyword}", select(func.count(Post.id)).where(search_filter)
         )
-        .where(search_filter)
-        .order_by(desc(Post.created_at))
-        .offset(offset)
-        .limit(limit)
-    )
-    result = await db.execute(query)
-    posts = result.scalars().all()
-    
-    # 查询总数
-    count_query = select(func.count(Post.id)).where(search_filter)
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    items = [format_post(post, current_user) for post in posts]
     
-    return success_response(
-        data={
-            "items": items,
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "keyword": keyword,
-            "hasMore": offset + len(items) < total
+    items = await format_posts(db, posts, current_user, full)
+    for post, item in zip(posts, items):
+        item["highlight"] = {
+            "title": highlight(post.title, keyword),
+            "content": highlight(post.content, keyword, SNIPPET_RADIUS)
         }
+    
+    return json_response(
+        success_response(
+            data={
+                "items": items,
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "keyword": keyword,
+                "hasMore": next_cursor is not None,
+                "nextCursor": next_cursor
+            }
+        )
     )
 
 
 @router.get("/recommended")
 async def get_recommended_posts(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    seed: Optional[int] = Query(None, ge=0, description="随机种子，相同种子下分页稳定"),
+    domain: Optional[int] = Query(None, ge=0, description="抽样的帖子ID范围，翻页时传入第一页返回的domain"),
+    cursor: Optional[str] = Query(None, description="分页游标（优先于page、seed和domain）"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
 ):
     """获取推荐帖子"""
-    offset = (page - 1) * limit
-    
-    # 简单的推荐算法：随机排序
-    query = (
-        select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments)
+    # 按种子对帖子ID做伪随机置换，每页只按主键读取
+    if cursor:
+        seed, domain, start = decode_cursor(cursor, int, int, int)
+    else:
+        if seed is None:
+            seed = default_seed(current_user)
+        # 固定ID范围后，翻页期间新发布的帖子不会改变置换，各页不重叠
+        if domain is None:
+            max_id_result = await db.execute(select(func.max(Post.id)))
+            domain = max_id_result.scalar() or 0
+        start = (page - 1) * limit
+    
+    posts, next_position = await sample_posts(
+        db, seed, domain, start, limit, fill=cursor is not None, options=content_options(full)
+    )
+    next_cursor = encode_cursor(seed, domain, next_position) if next_position < domain else None
+    
+    total = await get_total(db, POSTS, select(func.count(Post.id)))
+    
+    items = await format_posts(db, posts, current_user, full)
+    
+    return json_response(
+        success_response(
+            data={
+                "items": items,
+                "total": total,
+                "page": page,
+                "limit": limit,
+                "seed": seed,
+                "domain": domain,
+                "hasMore": next_cursor is not None,
+                "nextCursor": next_cursor
+            }
         )
-        .order_by(func.random())
-        .offset(offset)
-        .limit(limit)
     )
-    result = await db.execute(query)
-    posts = result.scalars().all()
-    
-    count_query = select(func.count(Post.id))
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    items = [format_post(post, current_user) for post in posts]
-    
-    return success_response(
-        data={
-            "items": items,
-            "total": total,
-            "page": page,
-            "limit": limit,
-            "hasMore": offset + len(items) < total
-        }
+
+
+@router.get("/following")
+async def get_following_posts(
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
+):
+    """获取关注的人发布的帖子"""
+    posts, next_cursor = await fetch_timeline_page(
+        db, current_user.id, limit, cursor, options=content_options(full)
+    )
+    items = await format_posts(db, posts, current_user, full)
+    
+    return json_response(
+        success_response(
+            data={
+                "items": items,
+                "limit": limit,
+                "hasMore": next_cursor is not None,
+                "nextCursor": next_cursor
+            }
+        )
+    )
+
+
+async def fetch_post_version(db: AsyncSession, post_id: int) -> tuple:
+    """查询帖子详情的版本信息（帖子/作者/评论者更新时间、计数、评论点赞总数），帖子不存在时抛出404"""
+    comment_likes = (
+        select(func.coalesce(func.sum(Comment.like_count), 0))
+        .where(Comment.post_id == Post.id)
+        .scalar_subquery()
+    )
+    # 详情内嵌评论作者的头像和用户名，任一评论者修改资料后版本随之变化
+    commenter = aliased(User)
+    commenters_updated_at = (
+        select(func.max(commenter.updated_at))
+        .join(Comment, Comment.author_id == commenter.id)
+        .where(Comment.post_id == Post.id)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        select(
+            Post.updated_at,
+            Post.like_count,
+            Post.comment_count,
+            Post.favorite_count,
+            Post.view_count,
+            User.updated_at,
+            comment_likes,
+            commenters_updated_at,
+        )
+        .join(User, Post.author_id == User.id)
+        .where(Post.id == post_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="帖子不存在"
+        )
+    return tuple(row)
+
+
+def post_detail_etag(post_id: int, version: tuple, current_user: Optional[Principal]) -> str:
+    """帖子详情的 ETag（浏览量包含缓冲区中未写回的部分）"""
+    (
+        updated_at, likes, comments, favorites, views,
+        author_updated_at, comment_likes, commenters_updated_at
+    ) = version
+    return make_etag(
+        "post",
+        post_id,
+        updated_at,
+        likes,
+        comments,
+        favorites,
+        views + view_buffer.pending(post_id),
+        author_updated_at,
+        comment_likes,
+        commenters_updated_at,
+        current_user.id if current_user else "guest",
     )
 
 
 @router.get("/{post_id}")
 async def get_post_detail(
     post_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)]
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)]
 ):
     """获取帖子详情"""
+    # 先用轻量查询比对 ETag，未变化时不计浏览量，直接返回 304
+    version = await fetch_post_version(db, post_id)
+    etag = post_detail_etag(post_id, version, current_user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # 增加浏览量（写入缓冲区，由后台任务批量写回）
+    view_buffer.record(post_id)
+    etag = post_detail_etag(post_id, version, current_user)
+    
     query = (
         select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments).selectinload(Comment.author),
-            selectinload(Post.comments).selectinload(Comment.likes)
-        )
+        .options(selectinload(Post.author))
         .where(Post.id == post_id)
     )
     result = await db.execute(query)
@@ -280,18 +529,27 @@ async def get_post_detail(
             detail="帖子不存在"
         )
     
-    # 增加浏览量
-    post.view_count += 1
-    await db.flush()
+    # 只内嵌第一页评论
+    comments, comments_cursor = await fetch_comment_page(db, post_id, limit=DETAIL_COMMENT_LIMIT)
     
-    return success_response(data=format_post_detail(post, current_user))
+    viewer = await load_viewer_state(
+        db,
+        current_user,
+        post_ids=[post.id],
+        comment_ids=[comment.id for comment in comments]
+    )
+    
+    return json_response(
+        success_response(data=format_post_detail(post, comments, comments_cursor, viewer)),
+        headers={"ETag": etag}
+    )
 
 
 @router.post("")
 async def create_post(
     post_data: PostCreate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     """创建帖子"""
     new_post = Post(
@@ -304,6 +562,12 @@ async def create_post(
     db.add(new_post)
     await db.flush()
     await db.refresh(new_post)
+    await index_post(db, new_post)
+    await adjust_total(db, POSTS, 1)
+    await adjust_total(db, author_posts_key(current_user.id), 1)
+    schedule_invalidation(db, *FEED_NAMESPACES, "stats")
+    # 提交后由后台任务写入关注者的时间线
+    timeline_fanout.schedule(db, new_post.id)
     
     return success_response(
         data={
@@ -322,6 +586,7 @@ async def create_post(
             "commentCount": 0,
             "viewCount": 0,
             "isLiked": False,
+            "isFavorited": False,
             "createdAt": new_post.created_at.isoformat(),
             "updatedAt": new_post.updated_at.isoformat(),
             "comments": []
@@ -335,17 +600,13 @@ async def update_post(
     post_id: int,
     post_data: PostUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     """修改帖子"""
     # 查询帖子
     query = (
         select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments)
-        )
+        .options(selectinload(Post.author))
         .where(Post.id == post_id)
     )
     result = await db.execute(query)
@@ -376,9 +637,13 @@ async def update_post(
     
     await db.flush()
     await db.refresh(post)
+    await index_post(db, post)
+    schedule_invalidation(db, *FEED_NAMESPACES)
+    
+    viewer = await load_viewer_state(db, current_user, post_ids=[post.id])
     
     return success_response(
-        data=format_post(post, current_user),
+        data=format_post(post, viewer),
         message="修改成功"
     )
 
@@ -387,7 +652,7 @@ async def update_post(
 async def delete_post(
     post_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
     """删除帖子"""
     # 查询帖子
@@ -407,107 +672,110 @@ async def delete_post(
             detail="无权删除此帖子"
         )
     
+    # 扣减总数（需在删除收藏记录之前）
+    await release_post_totals(db, [post])
+    
     # 删除相关的点赞记录
-    await db.execute(
-        select(PostLike).where(PostLike.post_id == post_id)
-    )
-    from sqlalchemy import delete
     await db.execute(delete(PostLike).where(PostLike.post_id == post_id))
     
     # 删除相关的收藏记录
     await db.execute(delete(PostFavorite).where(PostFavorite.post_id == post_id))
     
     # 删除相关的评论点赞和评论
-    from app.models.comment import CommentLike
     comments_result = await db.execute(select(Comment.id).where(Comment.post_id == post_id))
     comment_ids = [row[0] for row in comments_result.fetchall()]
     if comment_ids:
         await db.execute(delete(CommentLike).where(CommentLike.comment_id.in_(comment_ids)))
         await db.execute(delete(Comment).where(Comment.post_id == post_id))
     
+    await remove_posts_from_timelines(db, [post_id])
+    
     # 删除帖子
     await db.delete(post)
+    schedule_invalidation(db, *FEED_NAMESPACES, "stats")
     
     return success_response(message="删除成功")
 
 
-@router.post("/{post_id}/like")
-async def like_post(
-    post_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
-):
-    """点赞/取消点赞帖子"""
+async def toggle_post_like(db: AsyncSession, post_id: int, user_id: int) -> dict:
+    """切换帖子点赞状态（在写入队列的批次事务中执行）"""
     # 检查帖子是否存在
-    result = await db.execute(select(Post).where(Post.id == post_id))
-    post = result.scalar_one_or_none()
-    
-    if not post:
+    result = await db.execute(_POST_EXISTS, {"post_id": post_id})
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="帖子不存在"
         )
     
     # 检查是否已点赞
-    result = await db.execute(
-        select(PostLike).where(
-            PostLike.post_id == post_id,
-            PostLike.user_id == current_user.id
-        )
-    )
+    result = await db.execute(_POST_LIKE, {"post_id": post_id, "user_id": user_id})
     existing_like = result.scalar_one_or_none()
     
     if existing_like:
         # 取消点赞
         await db.delete(existing_like)
+        await adjust_post_counters(db, post_id, likes=-1)
         message = "取消点赞成功"
     else:
-        # 点赞
-        new_like = PostLike(post_id=post_id, user_id=current_user.id)
-        db.add(new_like)
+        # 点赞（唯一索引防止并发请求重复点赞）
+        if await add_unique(db, PostLike(post_id=post_id, user_id=user_id)):
+            await adjust_post_counters(db, post_id, likes=1)
         message = "点赞成功"
     
     return success_response(message=message)
 
 
-@router.post("/{post_id}/favorite")
-async def favorite_post(
+@router.post("/{post_id}/like")
+async def like_post(
     post_id: int,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[Principal, Depends(get_current_user)]
 ):
-    """收藏/取消收藏帖子"""
+    """点赞/取消点赞帖子"""
+    user_id = current_user.id
+    return await write_queue.run(db, lambda session: toggle_post_like(session, post_id, user_id))
+
+
+async def toggle_post_favorite(db: AsyncSession, post_id: int, user_id: int) -> dict:
+    """切换帖子收藏状态（在写入队列的批次事务中执行）"""
     # 检查帖子是否存在
-    result = await db.execute(select(Post).where(Post.id == post_id))
-    post = result.scalar_one_or_none()
-    
-    if not post:
+    result = await db.execute(_POST_EXISTS, {"post_id": post_id})
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="帖子不存在"
         )
     
     # 检查是否已收藏
-    result = await db.execute(
-        select(PostFavorite).where(
-            PostFavorite.post_id == post_id,
-            PostFavorite.user_id == current_user.id
-        )
-    )
+    result = await db.execute(_POST_FAVORITE, {"post_id": post_id, "user_id": user_id})
     existing_favorite = result.scalar_one_or_none()
     
     if existing_favorite:
         # 取消收藏
         await db.delete(existing_favorite)
+        await adjust_post_counters(db, post_id, favorites=-1)
+        await adjust_total(db, user_favorites_key(user_id), -1)
         return success_response(
             data={"isFavorited": False},
             message="已取消收藏"
         )
     else:
-        # 收藏
-        new_favorite = PostFavorite(post_id=post_id, user_id=current_user.id)
-        db.add(new_favorite)
+        # 收藏（唯一索引防止并发请求重复收藏）
+        if await add_unique(db, PostFavorite(post_id=post_id, user_id=user_id)):
+            await adjust_post_counters(db, post_id, favorites=1)
+            await adjust_total(db, user_favorites_key(user_id), 1)
         return success_response(
             data={"isFavorited": True},
             message="收藏成功"
         )
+
+
+@router.post("/{post_id}/favorite")
+async def favorite_post(
+    post_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
+):
+    """收藏/取消收藏帖子"""
+    user_id = current_user.id
+    return await write_queue.run(db, lambda session: toggle_post_favorite(session, post_id, user_id))
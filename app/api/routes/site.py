@@ -10,13 +10,16 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.cache import response_cache
+from app.core.database import get_read_db
 from app.core.deps import get_current_user_optional
 from app.core.timezone import now_beijing, BEIJING_TZ
 from app.models.user import User
 from app.models.post import Post
 from app.models.site import Fortune, Developer, UserFortune
 from app.schemas.common import success_response
+from app.services.principals import Principal
+from app.services.totals import POSTS, USERS, get_total
 
 router = APIRouter(prefix="/site", tags=["站点"])
 
@@ -55,12 +58,16 @@ DEFAULT_DEVELOPERS = [
 
 @router.get("/stats")
 async def get_site_stats(
-    db: Annotated[AsyncSession, Depends(get_db)]
+    db: Annotated[AsyncSession, Depends(get_read_db)]
 ):
     """获取站点统计"""
+    cache_key = response_cache.make_key("stats")
+    cached = response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     # 总帖子数
-    total_posts_result = await db.execute(select(func.count(Post.id)))
-    total_posts = total_posts_result.scalar() or 0
+    total_posts = await get_total(db, POSTS, select(func.count(Post.id)))
     
     # 今日新帖
     today = now_beijing().date()
@@ -71,26 +78,27 @@ async def get_site_stats(
     today_posts = today_posts_result.scalar() or 0
     
     # 注册用户数
-    total_users_result = await db.execute(select(func.count(User.id)))
-    total_users = total_users_result.scalar() or 0
+    total_users = await get_total(db, USERS, select(func.count(User.id)))
     
     # 在线用户数（模拟）
     online_users = random.randint(50, 200)
     
-    return success_response(
-        data={
-            "totalPosts": total_posts,
-            "todayPosts": today_posts,
-            "totalUsers": total_users,
-            "onlineUsers": online_users
-        }
+    return response_cache.store(
+        cache_key,
+        success_response(
+            data={
+                "totalPosts": total_posts,
+                "todayPosts": today_posts,
+                "totalUsers": total_users,
+                "onlineUsers": online_users
+            }
+        )
     )
 
 
 @router.get("/fortune")
 async def get_fortune(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)]
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)]
 ):
     """获取今日运势"""
     today_str = date.today().isoformat()
@@ -7,35 +7,62 @@ import uuid
 from datetime import datetime
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, select, func, delete, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.core.database import get_db
+from app.core.cache import FEED_NAMESPACES, schedule_invalidation
+from app.core.database import add_unique, get_db, get_read_db
 from app.core.config import settings
-from app.core.security import verify_password, get_password_hash
-from app.core.deps import get_current_user, get_current_user_optional
+from app.core.security import password_hasher
+from app.core.deps import get_current_account, get_current_user, get_current_user_optional
+from app.core.pagination import decode_cursor, keyset_before, split_page
+from app.core.write_queue import write_queue
+from app.api.routes.posts import content_options, format_posts
 from app.models.user import User, Follow
-from app.models.post import Post, PostLike, PostFavorite
+from app.models.post import Post, PostFavorite
+from app.models.timeline import TimelineEntry
 from app.schemas.user import UserProfileUpdate, PasswordChange, UserSettings, DeleteAccount
 from app.schemas.common import success_response
+from app.services.authors import author_cache
+from app.services.counters import (
+    recount_posts,
+    recount_comments,
+    user_touched_posts_query,
+    user_touched_comments_query,
+)
+from app.services.principals import Principal, principal_cache
+from app.services.timeline import backfill_timeline, remove_author_from_timeline
+from app.services.totals import (
+    adjust_total,
+    author_posts_key,
+    followers_key,
+    following_key,
+    forget_user_totals,
+    get_total,
+    user_favorites_key,
+)
+from app.services.viewer_state import load_viewer_state
 from scripts.uploadImage2Oss import upload_file, bucket
-    
+
 router = APIRouter(prefix="/users", tags=["用户"])
 
+# 关注切换中的查询（预构建语句，每次只绑定参数）
+_USER_EXISTS = select(User.id).where(User.id == bindparam("user_id"))
+_FOLLOW = select(Follow).where(
+    Follow.follower_id == bindparam("follower_id"),
+    Follow.following_id == bindparam("following_id")
+)
+
 
 @router.get("/{user_id}/profile")
 async def get_user_profile(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)]
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)]
 ):
     """获取用户资料"""
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.posts), selectinload(User.followers), selectinload(User.following))
-        .where(User.id == user_id)
-    )
+    result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     
     if not user:
@@ -46,13 +73,23 @@ async def get_user_profile(
     
     # 统计获赞数
     likes_count_query = (
-        select(func.count(PostLike.id))
-        .join(Post, Post.id == PostLike.post_id)
+        select(func.coalesce(func.sum(Post.like_count), 0))
         .where(Post.author_id == user_id)
     )
     likes_result = await db.execute(likes_count_query)
     likes_count = likes_result.scalar() or 0
     
+    # 帖子数、粉丝数、关注数读取维护的计数
+    posts_count = await get_total(
+        db, author_posts_key(user_id), select(func.count(Post.id)).where(Post.author_id == user_id)
+    )
+    followers_count = await get_total(
+        db, followers_key(user_id), select(func.count(Follow.id)).where(Follow.following_id == user_id)
+    )
+    following_count = await get_total(
+        db, following_key(user_id), select(func.count(Follow.id)).where(Follow.follower_id == user_id)
+    )
+    
     return success_response(
         data={
             "id": user.id,
@@ -60,10 +97,10 @@ async def get_user_profile(
             "email": user.email,
             "avatar": user.get_avatar_url(),
             "signature": user.signature,
-            "postsCount": len(user.posts),
+            "postsCount": posts_count,
             "likesCount": likes_count,
-            "followersList": user.followers,
-            "followingList": user.following,
+            "followersCount": followers_count,
+            "followingCount": following_count,
             "createdAt": user.created_at.isoformat()
         }
     )
@@ -73,7 +110,7 @@ async def get_user_profile(
 async def update_profile(
     profile_data: UserProfileUpdate,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_account)]
 ):
     """更新用户资料"""
     # 检查用户名是否重复
@@ -101,6 +138,10 @@ async def update_profile(
     
     await db.flush()
     await db.refresh(current_user)
+    # 帖子列表中内嵌了作者信息
+    schedule_invalidation(db, *FEED_NAMESPACES)
+    author_cache.schedule_invalidation(db, current_user.id)
+    principal_cache.schedule_invalidation(db, current_user.id)
     
     return success_response(
         data={
@@ -119,16 +160,16 @@ async def update_profile(
 async def change_password(
     password_data: PasswordChange,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_account)]
 ):
     """修改密码"""
-    if not verify_password(password_data.currentPassword, current_user.hashed_password):
+    if not await password_hasher.verify(password_data.currentPassword, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="当前密码错误"
         )
     
-    current_user.hashed_password = get_password_hash(password_data.newPassword)
+    current_user.hashed_password = await password_hasher.hash(password_data.newPassword)
     await db.flush()
     
     return success_response(message="密码修改成功")
@@ -138,7 +179,7 @@ async def change_password(
 async def upload_avatar(
     avatar: UploadFile = File(...),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_current_account)
 ):
     """上传头像"""
     # 检查文件类型
@@ -170,11 +211,14 @@ async def upload_avatar(
         object_name=f"avatars/{filename}",
         data=content
     )
-
+    
     # 更新用户头像URL
     avatar_url = f"https://cynite.oss-cn-guangzhou.aliyuncs.com/avatars/{filename}"
     current_user.avatar = avatar_url
     await db.flush()
+    schedule_invalidation(db, *FEED_NAMESPACES)
+    author_cache.schedule_invalidation(db, current_user.id)
+    principal_cache.schedule_invalidation(db, current_user.id)
     
     return success_response(
         data={"avatarUrl": avatar_url},
@@ -185,14 +229,14 @@ async def upload_avatar(
 @router.get("/{user_id}/posts")
 async def get_user_posts(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     page: int = Query(1, ge=1),
-    pageSize: int = Query(20, ge=1, le=100)
+    pageSize: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标（优先于page）"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
 ):
     """获取用户发布的帖子"""
-    offset = (page - 1) * pageSize
-    
     # 检查用户是否存在
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -205,124 +249,99 @@ async def get_user_posts(
     # 查询帖子
     query = (
         select(Post)
-        .options(
-            selectinload(Post.author),
-            selectinload(Post.likes),
-            selectinload(Post.comments)
-        )
+        .options(*content_options(full))
         .where(Post.author_id == user_id)
-        .order_by(Post.created_at.desc())
-        .offset(offset)
-        .limit(pageSize)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+    )
+    if cursor:
+        query = query.where(
+            keyset_before((Post.created_at, Post.id), decode_cursor(cursor, datetime, int))
+        )
+    else:
+        query = query.offset((page - 1) * pageSize)
+    result = await db.execute(query.limit(pageSize + 1))
+    posts, next_cursor = split_page(
+        result.scalars().all(), pageSize, lambda post: (post.created_at, post.id)
     )
-    result = await db.execute(query)
-    posts = result.scalars().all()
     
     # 统计总数
-    count_result = await db.execute(select(func.count(Post.id)).where(Post.author_id == user_id))
-    total = count_result.scalar() or 0
+    total = await get_total(
+        db, author_posts_key(user_id), select(func.count(Post.id)).where(Post.author_id == user_id)
+    )
     
-    items = []
-    for post in posts:
-        is_liked = False
-        if current_user:
-            is_liked = any(like.user_id == current_user.id for like in post.likes)
-        
-        items.append({
-            "id": post.id,
-            "title": post.title,
-            "content": post.content,
-            "images": post.images or [],
-            "author": {
-                "id": post.author.id,
-                "username": post.author.username,
-                "avatar": post.author.get_avatar_url()
-            },
-            "likes": len(post.likes),
-            "commentCount": len(post.comments),
-            "viewCount": post.view_count,
-            "isLiked": is_liked,
-            "createdAt": post.created_at.isoformat(),
-            "updatedAt": post.updated_at.isoformat()
-        })
+    items = await format_posts(db, posts, current_user, full)
     
     return success_response(
         data={
             "items": items,
             "total": total,
             "page": page,
-            "pageSize": pageSize
+            "pageSize": pageSize,
+            "hasMore": next_cursor is not None,
+            "nextCursor": next_cursor
         }
     )
 
 
 @router.get("/favorites")
 async def get_user_favorites(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)],
     page: int = Query(1, ge=1),
-    pageSize: int = Query(20, ge=1, le=100)
+    pageSize: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="分页游标（优先于page）"),
+    full: bool = Query(False, description="是否返回完整正文（默认 content 为摘要）")
 ):
     """获取用户收藏的帖子"""
-    offset = (page - 1) * pageSize
-    
     # 查询收藏
     query = (
         select(PostFavorite)
         .options(
-            selectinload(PostFavorite.post).selectinload(Post.author),
-            selectinload(PostFavorite.post).selectinload(Post.likes),
-            selectinload(PostFavorite.post).selectinload(Post.comments)
+            selectinload(PostFavorite.post).options(*content_options(full))
         )
         .where(PostFavorite.user_id == current_user.id)
-        .order_by(PostFavorite.created_at.desc())
-        .offset(offset)
-        .limit(pageSize)
+        .order_by(PostFavorite.created_at.desc(), PostFavorite.id.desc())
+    )
+    if cursor:
+        query = query.where(
+            keyset_before(
+                (PostFavorite.created_at, PostFavorite.id),
+                decode_cursor(cursor, datetime, int)
+            )
+        )
+    else:
+        query = query.offset((page - 1) * pageSize)
+    result = await db.execute(query.limit(pageSize + 1))
+    favorites, next_cursor = split_page(
+        result.scalars().all(), pageSize, lambda fav: (fav.created_at, fav.id)
     )
-    result = await db.execute(query)
-    favorites = result.scalars().all()
     
     # 统计总数
-    count_result = await db.execute(
+    total = await get_total(
+        db,
+        user_favorites_key(current_user.id),
         select(func.count(PostFavorite.id)).where(PostFavorite.user_id == current_user.id)
     )
-    total = count_result.scalar() or 0
     
-    items = []
-    for fav in favorites:
-        post = fav.post
-        is_liked = any(like.user_id == current_user.id for like in post.likes)
-        
-        items.append({
-            "id": post.id,
-            "title": post.title,
-            "content": post.content,
-            "author": {
-                "id": post.author.id,
-                "username": post.author.username,
-                "avatar": post.author.get_avatar_url()
-            },
-            "likes": len(post.likes),
-            "commentCount": len(post.comments),
-            "viewCount": post.view_count,
-            "isLiked": is_liked,
-            "favoriteAt": fav.created_at.isoformat(),
-            "createdAt": post.created_at.isoformat()
-        })
+    items = await format_posts(db, [fav.post for fav in favorites], current_user, full)
+    for fav, item in zip(favorites, items):
+        item["favoriteAt"] = fav.created_at.isoformat()
     
     return success_response(
         data={
             "items": items,
             "total": total,
             "page": page,
-            "pageSize": pageSize
+            "pageSize": pageSize,
+            "hasMore": next_cursor is not None,
+            "nextCursor": next_cursor
         }
     )
 
 
 @router.get("/settings")
 async def get_user_settings(
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_account)]
 ):
     """获取用户设置"""
     return success_response(
@@ -338,7 +357,7 @@ async def get_user_settings(
 async def update_user_settings(
     settings_data: UserSettings,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_account)]
 ):
     """更新用户设置"""
     current_user.email_notifications = settings_data.emailNotifications
@@ -361,74 +380,100 @@ async def update_user_settings(
 async def delete_account(
     delete_data: DeleteAccount,
     db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
+    current_user: Annotated[User, Depends(get_current_account)]
 ):
     """删除账号"""
-    if not verify_password(delete_data.password, current_user.hashed_password):
+    if not await password_hasher.verify(delete_data.password, current_user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="密码错误"
         )
     
+    # 记录受影响的帖子/评论，删除后重新统计计数
+    touched_posts = await db.execute(user_touched_posts_query(current_user.id))
+    touched_post_ids = set(touched_posts.scalars().all())
+    touched_comments = await db.execute(user_touched_comments_query(current_user.id))
+    touched_comment_ids = set(touched_comments.scalars().all())
+    
+    await forget_user_totals(db, current_user.id)
+    
+    # 清理自己的收件箱以及自己帖子在他人收件箱中的条目
+    await db.execute(
+        delete(TimelineEntry).where(
+            or_(TimelineEntry.user_id == current_user.id, TimelineEntry.author_id == current_user.id)
+        )
+    )
     await db.delete(current_user)
+    await db.flush()
+    
+    await recount_posts(db, touched_post_ids)
+    await recount_comments(db, touched_comment_ids)
+    schedule_invalidation(db, *FEED_NAMESPACES, "stats")
+    author_cache.schedule_invalidation(db, current_user.id)
+    principal_cache.schedule_invalidation(db, current_user.id)
     
     return success_response(message="账号已删除")
 
 
-@router.post("/{user_id}/follow")
-async def follow_user(
-    user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[User, Depends(get_current_user)]
-):
-    """关注/取消关注用户"""
-    if user_id == current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="不能关注自己"
-        )
-    
+async def toggle_follow(db: AsyncSession, follower_id: int, user_id: int) -> dict:
+    """切换关注状态（在写入队列的批次事务中执行）"""
     # 检查用户是否存在
-    result = await db.execute(select(User).where(User.id == user_id))
-    target_user = result.scalar_one_or_none()
-    
-    if not target_user:
+    result = await db.execute(_USER_EXISTS, {"user_id": user_id})
+    if result.scalar_one_or_none() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="用户不存在"
         )
     
     # 检查是否已关注
-    result = await db.execute(
-        select(Follow).where(
-            Follow.follower_id == current_user.id,
-            Follow.following_id == user_id
-        )
-    )
+    result = await db.execute(_FOLLOW, {"follower_id": follower_id, "following_id": user_id})
     existing_follow = result.scalar_one_or_none()
     
     if existing_follow:
         # 取消关注
         await db.delete(existing_follow)
+        await remove_author_from_timeline(db, follower_id, user_id)
+        await adjust_total(db, followers_key(user_id), -1)
+        await adjust_total(db, following_key(follower_id), -1)
         return success_response(
             data={"isFollowing": False},
             message="已取消关注"
         )
     else:
-        # 关注
-        new_follow = Follow(follower_id=current_user.id, following_id=user_id)
-        db.add(new_follow)
+        # 关注（唯一索引防止并发请求重复关注）
+        if await add_unique(db, Follow(follower_id=follower_id, following_id=user_id)):
+            # 先更新粉丝数：补收件箱时按粉丝数判断是否为读时拉取的作者
+            await adjust_total(db, followers_key(user_id), 1)
+            await adjust_total(db, following_key(follower_id), 1)
+            await backfill_timeline(db, follower_id, user_id)
         return success_response(
             data={"isFollowing": True},
             message="关注成功"
         )
 
 
+@router.post("/{user_id}/follow")
+async def follow_user(
+    user_id: int,
+    db: Annotated[AsyncSession, Depends(get_db)],
+    current_user: Annotated[Principal, Depends(get_current_user)]
+):
+    """关注/取消关注用户"""
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="不能关注自己"
+        )
+    
+    follower_id = current_user.id
+    return await write_queue.run(db, lambda session: toggle_follow(session, follower_id, user_id))
+
+
 @router.get("/{user_id}/followers")
 async def get_followers(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     page: int = Query(1, ge=1),
     pageSize: int = Query(20, ge=1, le=100)
 ):
@@ -450,38 +495,32 @@ async def get_followers(
         .where(Follow.following_id == user_id)
         .order_by(Follow.created_at.desc())
         .offset(offset)
-        .limit(pageSize)
+        .limit(pageSize + 1)
     )
     result = await db.execute(query)
     follows = result.scalars().all()
+    has_more = len(follows) > pageSize
+    follows = follows[:pageSize]
     
     # 统计总数
-    count_result = await db.execute(
-        select(func.count(Follow.id)).where(Follow.following_id == user_id)
+    total = await get_total(
+        db, followers_key(user_id), select(func.count(Follow.id)).where(Follow.following_id == user_id)
+    )
+    
+    # 检查当前用户是否关注了这些粉丝（一次批量查询）
+    viewer = await load_viewer_state(
+        db, current_user, user_ids=[follow.follower_id for follow in follows]
     )
-    total = count_result.scalar() or 0
     
-    # 检查当前用户是否关注了这些粉丝
     items = []
     for follow in follows:
         follower = follow.follower
-        is_following = False
-        
-        if current_user:
-            follow_check = await db.execute(
-                select(Follow).where(
-                    Follow.follower_id == current_user.id,
-                    Follow.following_id == follower.id
-                )
-            )
-            is_following = follow_check.scalar_one_or_none() is not None
-        
         items.append({
             "id": follower.id,
             "username": follower.username,
             "avatar": follower.get_avatar_url(),
             "signature": follower.signature,
-            "isFollowing": is_following,
+            "isFollowing": viewer.is_following(follower.id),
             "followedAt": follow.created_at.isoformat()
         })
     
@@ -490,7 +529,8 @@ async def get_followers(
             "items": items,
             "total": total,
             "page": page,
-            "pageSize": pageSize
+            "pageSize": pageSize,
+            "hasMore": has_more
         }
     )
 
@@ -498,8 +538,8 @@ async def get_followers(
 @router.get("/{user_id}/following")
 async def get_following(
     user_id: int,
-    db: Annotated[AsyncSession, Depends(get_db)],
-    current_user: Annotated[Optional[User], Depends(get_current_user_optional)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    current_user: Annotated[Optional[Principal], Depends(get_current_user_optional)],
     page: int = Query(1, ge=1),
     pageSize: int = Query(20, ge=1, le=100)
 ):
@@ -521,28 +561,32 @@ async def get_following(
         .where(Follow.follower_id == user_id)
         .order_by(Follow.created_at.desc())
         .offset(offset)
-        .limit(pageSize)
+        .limit(pageSize + 1)
     )
     result = await db.execute(query)
     follows = result.scalars().all()
+    has_more = len(follows) > pageSize
+    follows = follows[:pageSize]
     
     # 统计总数
-    count_result = await db.execute(
-        select(func.count(Follow.id)).where(Follow.follower_id == user_id)
+    total = await get_total(
+        db, following_key(user_id), select(func.count(Follow.id)).where(Follow.follower_id == user_id)
+    )
+    
+    # 当前用户是否关注了列表中的用户（查看他人的关注列表时不一定为true）
+    viewer = await load_viewer_state(
+        db, current_user, user_ids=[follow.following_id for follow in follows]
     )
-    total = count_result.scalar() or 0
     
     items = []
     for follow in follows:
         following_user = follow.following
-        is_following = True  # 查询的就是关注列表，所以肯定是true
-        
         items.append({
             "id": following_user.id,
             "username": following_user.username,
             "avatar": following_user.get_avatar_url(),
             "signature": following_user.signature,
-            "isFollowing": is_following,
+            "isFollowing": viewer.is_following(following_user.id),
             "followedAt": follow.created_at.isoformat()
         })
     
@@ -551,6 +595,7 @@ async def get_following(
             "items": items,
             "total": total,
             "page": page,
-            "pageSize": pageSize
+            "pageSize": pageSize,
+            "hasMore": has_more
         }
     )
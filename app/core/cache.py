@@ -0,0 +1,193 @@
+"""
+响应缓存模块 - 为匿名请求缓存序列化后的JSON响应
+
+缓存按命名空间组织（如 posts / hot / stats），键为 "命名空间:查询参数"。
+写操作通过 schedule_invalidation 登记需要失效的命名空间，在数据库事务提交后
+才真正清除，避免并发请求在提交前把旧数据重新写入缓存。SAVEPOINT 的释放和回滚
+同样会触发 after_commit / after_rollback，监听器只在最外层事务结束时处理，
+否则写入队列批次中途就会清除缓存，批次提交前的读请求又会把旧数据写回缓存。
+
+默认使用进程内 LRU + TTL 后端，多进程部署可实现 CacheBackend 接入共享存储。
+"""
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Mapping, Optional
+from urllib.parse import urlencode
+
+from fastapi.responses import Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.responses import dump_json
+
+# session.info 中保存待失效命名空间的键
+_PENDING_KEY = "cache_invalidations"
+
+
+class CacheBackend(ABC):
+    """缓存后端接口"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存，不存在或已过期时返回 None"""
+    
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """写入缓存"""
+    
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> int:
+        """删除指定前缀的全部键，返回删除数量"""
+    
+    @abstractmethod
+    def size(self) -> int:
+        """当前缓存条目数"""
+    
+    @abstractmethod
+    def version(self, namespace: str) -> int:
+        """命名空间当前版本号（用于生成 ETag）"""
+    
+    @abstractmethod
+    def bump(self, namespace: str) -> int:
+        """递增命名空间版本号"""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内 LRU + TTL 缓存后端"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+    
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def delete_prefix(self, prefix: str) -> int:
+        keys = [key for key in self._data if key.startswith(prefix)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+    
+    def size(self) -> int:
+        return len(self._data)
+    
+    def version(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+    
+    def bump(self, namespace: str) -> int:
+        self._versions[namespace] = self._versions.get(namespace, 0) + 1
+        return self._versions[namespace]
+
+
+class ResponseCache:
+    """匿名响应缓存"""
+    
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    @staticmethod
+    def make_key(namespace: str, **params: Any) -> str:
+        """根据命名空间和查询参数生成缓存键"""
+        items = sorted((name, value) for name, value in params.items() if value is not None)
+        return f"{namespace}:{urlencode(items)}"
+    
+    def get(self, key: str) -> Optional[Response]:
+        """命中时返回可直接输出的响应"""
+        if not self.enabled:
+            return None
+        body = self.backend.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+    
+    def store(self, key: str, payload: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+        """序列化响应数据，写入缓存并返回响应"""
+        body = dump_json(payload)
+        if self.enabled:
+            self.backend.set(key, body, self.ttl)
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={**(headers or {}), "X-Cache": "MISS"}
+        )
+    
+    def invalidate(self, *namespaces: str) -> None:
+        """立即清除指定命名空间，并递增其版本号"""
+        for namespace in namespaces:
+            self.backend.delete_prefix(f"{namespace}:")
+            self.backend.bump(namespace)
+        self.invalidations += 1
+    
+    def version(self, namespace: str) -> int:
+        """命名空间当前版本号"""
+        return self.backend.version(namespace)
+    
+    def stats(self) -> dict:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": self.backend.size(),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# 全局响应缓存实例
+response_cache = ResponseCache(
+    MemoryCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES),
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
+
+# 帖子内容或互动变化时需要失效的命名空间
+FEED_NAMESPACES = ("posts", "hot")
+
+
+def schedule_invalidation(db: AsyncSession, *namespaces: str) -> None:
+    """登记在当前事务提交后失效的缓存命名空间"""
+    db.info.setdefault(_PENDING_KEY, set()).update(namespaces)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    namespaces = session.info.pop(_PENDING_KEY, None)
+    if namespaces:
+        response_cache.invalidate(*namespaces)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    # SAVEPOINT 回滚不丢弃同一事务中其他操作登记的失效
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_PENDING_KEY, None)
@@ -14,12 +14,40 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = "sqlite+aiosqlite:///./anime_hub.db"
+    DB_WRITER_POOL_SIZE: int = 5  # 写连接池大小
+    DB_READER_POOL_SIZE: int = 10  # 只读连接池大小
+    DB_MAX_OVERFLOW: int = 10  # 每个连接池在繁忙时可额外创建的连接数
+    DB_POOL_TIMEOUT_SECONDS: float = 30  # 等待空闲连接的超时
+    DB_POOL_PRE_PING: bool = True  # 取出连接前先检测是否可用（PostgreSQL）
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # 连接最长复用时间（PostgreSQL）
+    DB_QUERY_CACHE_SIZE: int = 1200  # SQLAlchemy 编译缓存条目数（默认 500）
+    DB_STATEMENT_CACHE_SIZE: int = 100  # asyncpg 预编译语句缓存，经 PgBouncer 事务池连接时设为 0
+    
+    # 只读副本配置
+    DATABASE_REPLICA_URLS: list[str] = []  # 为空时读请求使用主库的只读连接池
+    DB_REPLICA_HEALTH_CHECK_SECONDS: float = 10  # 副本健康检查间隔
+    DB_REPLICA_HEALTH_TIMEOUT_SECONDS: float = 2  # 单次健康检查超时
+    DB_READ_YOUR_WRITES_SECONDS: float = 5  # 用户写操作后其读请求固定走主库的时长
+    DB_READ_PIN_MAX_ENTRIES: int = 10000
+    
+    # SQLite 引擎配置（仅 SQLite 生效）
+    SQLITE_JOURNAL_MODE: str = "WAL"  # WAL 模式下读写互不阻塞
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # WAL 下 NORMAL 即可保证一致性
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # 等待写锁的超时
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 内存映射读取 256MB
+    SQLITE_CACHE_SIZE_KB: int = 16 * 1024  # 每个连接的页缓存 16MB
+    SQLITE_TEMP_STORE: str = "MEMORY"  # 临时表和排序放在内存
     
     # JWT配置
     SECRET_KEY: str = "your-super-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7天
     
+    # 密码哈希配置
+    BCRYPT_ROUNDS: int = 12  # 修改后，旧哈希在用户下次登录时自动按新成本重新计算
+    PASSWORD_HASH_WORKERS: int = 2  # 执行 bcrypt 的线程数（同时进行的哈希计算上限）
+    PASSWORD_HASH_MAX_PENDING: int = 64  # 排队超过该数量时返回 503
+    
     # CORS配置
     CORS_ORIGINS: list[str] = ["*"]
     
@@ -28,6 +56,56 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
     ALLOWED_IMAGE_TYPES: list[str] = ["image/jpeg", "image/png", "image/gif"]
     
+    # 帖子列表配置
+    POST_EXCERPT_LENGTH: int = 140  # 列表摘要最大字符数
+    
+    # 热度排名配置
+    HOT_SCORE_GRAVITY: float = 1.8  # 时间衰减指数
+    HOT_SCORE_WINDOW_DAYS: int = 30  # 超出窗口的帖子热度归零
+    HOT_SCORE_REFRESH_SECONDS: int = 600  # 后台重新衰减间隔
+    
+    # 浏览量写缓冲配置
+    VIEW_FLUSH_SECONDS: float = 5  # 浏览量批量写回间隔
+    
+    # 推荐采样配置
+    RECOMMEND_RESHUFFLE_SECONDS: int = 6 * 3600  # 默认种子的重排周期
+    
+    # 匿名响应缓存配置
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 30  # 缓存有效期
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1024  # 进程内缓存最大条目数
+    
+    # 关注时间线配置
+    TIMELINE_FANOUT_MAX_FOLLOWERS: int = 5000  # 粉丝数超过该值的作者改为读时拉取
+    TIMELINE_BACKFILL_POSTS: int = 50  # 关注后补入收件箱的最近帖子数
+    
+    # 总数计数配置
+    TOTALS_CACHE_TTL_SECONDS: float = 60  # 带筛选条件的近似总数缓存时间
+    TOTALS_CACHE_MAX_ENTRIES: int = 1024
+    
+    # 写入队列配置
+    WRITE_QUEUE_ENABLED: bool = True  # 接入队列的路由由后台单写者批量提交
+    WRITE_QUEUE_MAX_BATCH: int = 64  # 每个事务最多合并的写操作数
+    WRITE_QUEUE_MAX_PENDING: int = 1000  # 排队超过该数量时返回 503
+    
+    # 作者摘要缓存配置
+    AUTHOR_CACHE_MAX_ENTRIES: int = 4096
+    
+    # 登录用户身份缓存配置
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30  # 脚本禁用或删除普通用户后，运行中的服务最迟在该时间后生效
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 4096
+    
+    # 登录限流配置
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 300  # 统计失败次数的滑动窗口
+    LOGIN_MAX_FAILURES_PER_IP: int = 20  # 窗口内同一 IP 失败次数达到该值即锁定
+    LOGIN_MAX_FAILURES_PER_USERNAME: int = 5  # 窗口内同一用户名失败次数达到该值即锁定
+    LOGIN_MAX_IN_FLIGHT_PER_IP: int = 4  # 同一 IP 同时进行密码校验的登录请求数上限
+    LOGIN_MAX_IN_FLIGHT_PER_USERNAME: int = 2  # 同一用户名同时进行密码校验的登录请求数上限
+    LOGIN_LOCKOUT_BASE_SECONDS: float = 30  # 首次锁定时长，之后每次翻倍
+    LOGIN_LOCKOUT_MAX_SECONDS: float = 3600  # 锁定时长上限
+    LOGIN_THROTTLE_MAX_ENTRIES: int = 100000  # 进程内存储最多记录的 IP/用户名数
+    
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,17 +1,178 @@
 """
 数据库配置模块
+
+写引擎（engine）和只读引擎（read_engine）使用各自的连接池。SQLite 文件库下
+只读引擎以 mode=ro 打开，并在每个连接建立时设置 WAL、busy_timeout 等 PRAGMA，
+读请求不会被写事务阻塞，并发写入时等待写锁而不是立即报 database is locked。
+
+PostgreSQL（postgresql+asyncpg）下连接池额外启用 pre-ping 和定期回收，只读引擎
+的连接默认开启 default_transaction_read_only。
+
+GET 等不修改数据的请求只使用只读会话：关闭自动 flush、不提交事务，写入会直接报错。
+GET 接口通过 get_read_db 获取只读会话：配置了 DATABASE_REPLICA_URLS 时在健康的
+副本间轮询，副本全部不可用时回退到主库；用户提交写操作后的短时间内，其读请求
+固定走主库，保证能读到自己刚写入的数据。
 """
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import DeclarativeBase
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import Index, delete, event, func, inspect, select
+from sqlalchemy.engine import Connection, URL, make_url
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.exc import DBAPIError, IntegrityError, InvalidRequestError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, ORMExecuteState, Session
+from sqlalchemy.schema import CreateColumn
 
+from app.core.cache import MemoryCacheBackend
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
 
-# 创建异步引擎
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.DEBUG,
-)
+# 异步驱动对应的同步驱动（供同步脚本使用）
+SYNC_DRIVERS = {"aiosqlite": "pysqlite", "asyncpg": "psycopg"}
+
+
+def is_sqlite_file(url: URL) -> bool:
+    """是否为 SQLite 文件数据库（内存库无法拆分读写连接）"""
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def has_connection_pool(url: URL) -> bool:
+    """是否使用可配置大小的连接池（SQLite 内存库只能共用同一个连接）"""
+    return url.get_backend_name() != "sqlite" or is_sqlite_file(url)
+
+
+def sqlite_pragmas(read_only: bool = False) -> list[str]:
+    """SQLite 连接建立时执行的 PRAGMA（journal_mode 为库级设置，只在写连接上设置）"""
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}",
+        f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+        f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}",
+    ]
+    if not read_only:
+        pragmas.insert(0, f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    return pragmas
+
+
+def sync_database_url(url: str) -> URL:
+    """把异步数据库地址转换为同步驱动地址"""
+    url = make_url(url)
+    driver = SYNC_DRIVERS.get(url.get_driver_name())
+    if driver is None:
+        return url
+    return url.set(drivername=f"{url.get_backend_name()}+{driver}")
+
+
+def _read_only_url(url: URL) -> URL:
+    """把 SQLite 文件库地址转换为只读 URI 形式"""
+    return url.set(
+        database=Path(url.database).resolve().as_uri(),
+        query={**url.query, "mode": "ro", "uri": "true"},
+    )
+
+
+class CompiledCacheStats:
+    """SQL 编译缓存命中统计（命中时跳过 SQL 编译，只绑定参数）"""
+    
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+    
+    def record(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is CACHE_HIT:
+            self.hits += 1
+        elif cache_hit is CACHE_MISS:
+            self.misses += 1
+        else:
+            # SAVEPOINT、exec_driver_sql 等不经过编译缓存的语句
+            self.uncached += 1
+    
+    def attach(self, bound: AsyncEngine) -> None:
+        event.listen(bound.sync_engine, "after_cursor_execute", self.record)
+    
+    def stats(self) -> dict:
+        """命中次数和命中率"""
+        compiled = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hitRate": round(self.hits / compiled, 4) if compiled else 0.0,
+            "cacheSize": settings.DB_QUERY_CACHE_SIZE,
+        }
+
+
+# 全局编译缓存统计（所有引擎共用）
+compiled_cache_stats = CompiledCacheStats()
+
+
+def create_engine_for(url: URL, pool_size: int, read_only: bool = False) -> AsyncEngine:
+    """按连接池配置创建异步引擎，SQLite 文件库附加 PRAGMA"""
+    sqlite_file = is_sqlite_file(url)
+    if read_only and sqlite_file:
+        url = _read_only_url(url)
+    
+    engine_options = {}
+    if has_connection_pool(url):
+        engine_options = {
+            "pool_size": pool_size,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        }
+    if url.get_backend_name() == "postgresql":
+        engine_options["pool_pre_ping"] = settings.DB_POOL_PRE_PING
+        engine_options["pool_recycle"] = settings.DB_POOL_RECYCLE_SECONDS
+        if url.get_driver_name() == "asyncpg":
+            connect_args = {
+                "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            }
+            if read_only:
+                connect_args["server_settings"] = {"default_transaction_read_only": "on"}
+            engine_options["connect_args"] = connect_args
+    new_engine = create_async_engine(
+        url, echo=settings.DEBUG, query_cache_size=settings.DB_QUERY_CACHE_SIZE, **engine_options
+    )
+    compiled_cache_stats.attach(new_engine)
+    
+    if sqlite_file:
+        pragmas = sqlite_pragmas(read_only)
+        
+        @event.listens_for(new_engine.sync_engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+    
+    return new_engine
+
+
+_database_url = make_url(settings.DATABASE_URL)
+
+# 写引擎（所有读写事务默认使用）
+engine = create_engine_for(_database_url, settings.DB_WRITER_POOL_SIZE)
+
+# 只读引擎：配置了副本时每个副本一个，否则使用主库的只读连接池（内存库只能与写引擎共用连接）
+if settings.DATABASE_REPLICA_URLS:
+    replica_engines = [
+        create_engine_for(make_url(url), settings.DB_READER_POOL_SIZE, read_only=True)
+        for url in settings.DATABASE_REPLICA_URLS
+    ]
+elif has_connection_pool(_database_url):
+    replica_engines = [create_engine_for(_database_url, settings.DB_READER_POOL_SIZE, read_only=True)]
+else:
+    replica_engines = [engine]
+read_engine = replica_engines[0]
 
 # 创建异步会话工厂
 AsyncSessionLocal = async_sessionmaker(
@@ -20,14 +181,147 @@ AsyncSessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+# 只读会话工厂（不提交事务，也不需要自动 flush）
+ReadSessionLocal = async_sessionmaker(
+    read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+# 会话 info 中标记只读会话的键
+READ_ONLY_KEY = "read_only"
+
+# 不修改数据的请求方法
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
 
 class Base(DeclarativeBase):
     """ORM基类"""
     pass
 
 
-async def get_db():
-    """获取数据库会话依赖"""
+def is_read_only(session: AsyncSession) -> bool:
+    """是否为只读会话（可能连接到副本，不能写入）"""
+    return session.info.get(READ_ONLY_KEY, False)
+
+
+@event.listens_for(Session, "before_flush")
+def _reject_read_only_flush(session: Session, flush_context, instances) -> None:
+    if session.info.get(READ_ONLY_KEY):
+        raise InvalidRequestError("只读会话不能写入数据")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _reject_read_only_dml(orm_execute_state: ORMExecuteState) -> None:
+    is_dml = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_dml and orm_execute_state.session.info.get(READ_ONLY_KEY):
+        raise InvalidRequestError("只读会话不能写入数据")
+
+
+def read_pin_key(request: Request) -> Optional[str]:
+    """读己之写的固定键（同一登录凭证的请求共用）"""
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.blake2b(authorization.encode(), digest_size=16).hexdigest()
+
+
+class ReplicaRouter:
+    """只读会话路由：轮询健康的只读引擎，全部不可用时回退到主库"""
+    
+    def __init__(self, replicas: list[AsyncEngine], primary: AsyncEngine, pin_seconds: float):
+        self.replicas = replicas
+        self.primary = primary
+        self.pin_seconds = pin_seconds
+        self._healthy = [True] * len(replicas)
+        self._next = 0
+        self._pins = MemoryCacheBackend(settings.DB_READ_PIN_MAX_ENTRIES)
+        # 统计
+        self.reads = [0] * len(replicas)
+        self.fallbacks = 0
+        self.pinned = 0
+    
+    def pick(self) -> AsyncEngine:
+        """轮询选择一个健康的只读引擎"""
+        for _ in range(len(self.replicas)):
+            index = self._next
+            self._next = (index + 1) % len(self.replicas)
+            if self._healthy[index]:
+                self.reads[index] += 1
+                return self.replicas[index]
+        self.fallbacks += 1
+        return self.primary
+    
+    def engine_for(self, request: Request) -> AsyncEngine:
+        """请求使用的引擎（刚提交过写操作的用户读主库）"""
+        key = read_pin_key(request)
+        if key is not None and self._pins.get(key) is not None:
+            self.pinned += 1
+            return self.primary
+        return self.pick()
+    
+    def pin(self, request: Request) -> None:
+        """写操作提交后，在 pin_seconds 内把该用户的读请求固定到主库"""
+        key = read_pin_key(request)
+        if key is not None and self.pin_seconds > 0:
+            self._pins.set(key, b"1", self.pin_seconds)
+    
+    def mark_down(self, bind: AsyncEngine) -> None:
+        """连接失效时立即摘除引擎，由健康检查恢复"""
+        for index, replica in enumerate(self.replicas):
+            if replica is bind and self._healthy[index]:
+                self._healthy[index] = False
+                logger.warning("只读引擎 %s 连接失效，已暂停使用", replica.url)
+    
+    async def check_health(self) -> None:
+        """逐个检查只读引擎是否可用"""
+        for index, replica in enumerate(self.replicas):
+            try:
+                async with asyncio.timeout(settings.DB_REPLICA_HEALTH_TIMEOUT_SECONDS):
+                    async with replica.connect() as conn:
+                        await conn.exec_driver_sql("SELECT 1")
+                healthy = True
+            except Exception:
+                healthy = False
+            
+            if healthy != self._healthy[index]:
+                if healthy:
+                    logger.info("只读引擎 %s 已恢复", replica.url)
+                else:
+                    logger.warning("只读引擎 %s 健康检查失败，已暂停使用", replica.url)
+            self._healthy[index] = healthy
+    
+    async def run_health_checks(self, interval: float) -> None:
+        """后台任务：定期检查只读引擎"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+    
+    def stats(self) -> dict:
+        """各只读引擎的状态和路由统计"""
+        return {
+            "replicas": [
+                {"url": replica.url.render_as_string(hide_password=True), "healthy": healthy, "reads": reads}
+                for replica, healthy, reads in zip(self.replicas, self._healthy, self.reads)
+            ],
+            "fallbacks": self.fallbacks,
+            "pinned": self.pinned,
+        }
+
+
+# 全局只读会话路由
+read_router = ReplicaRouter(replica_engines, engine, settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+async def get_db(request: Request):
+    """获取主库会话依赖：写请求成功后提交，GET 等请求使用不提交的只读会话"""
+    if request.method in SAFE_METHODS:
+        async with ReadSessionLocal(bind=engine, info={READ_ONLY_KEY: True}) as session:
+            yield session
+        return
+    
     async with AsyncSessionLocal() as session:
         try:
             yield session
@@ -35,9 +329,82 @@ async def get_db():
         except Exception:
             await session.rollback()
             raise
+        # 写入提交后，该调用方短时间内的读请求走主库
+        read_router.pin(request)
+
+
+async def get_read_db(request: Request):
+    """获取只读会话依赖（GET 接口使用）：从副本读取，不提交"""
+    bind = read_router.engine_for(request)
+    async with ReadSessionLocal(bind=bind, info={READ_ONLY_KEY: True}) as session:
+        try:
+            yield session
+        except DBAPIError as exc:
+            if exc.connection_invalidated:
+                read_router.mark_down(bind)
+            raise
+
+
+async def add_unique(session: AsyncSession, instance: Base) -> bool:
+    """在 SAVEPOINT 中插入受唯一索引约束的行，并发请求已插入相同的行时返回 False"""
+    try:
+        async with session.begin_nested():
+            session.add(instance)
+    except IntegrityError:
+        return False
+    return True
+
+
+def _delete_duplicates(conn: Connection, index: Index) -> int:
+    """创建唯一索引前删除重复的行（保留 id 最小的一行）"""
+    table = index.table
+    keep = select(func.min(table.c.id)).group_by(*index.columns)
+    result = conn.execute(delete(table).where(table.c.id.not_in(keep)))
+    return result.rowcount
+
+
+def _upgrade_schema(conn: Connection) -> list[str]:
+    """为已存在的表补充模型中新增的字段和索引（create_all 不会修改已有表）"""
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing_columns = {col["name"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            column_ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column_ddl}")
+            added.append(f"{table.name}.{column.name}")
+        
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            duplicates = _delete_duplicates(conn, index) if index.unique else 0
+            index.create(conn)
+            added.append(f"{index.name}（删除重复记录 {duplicates} 条）" if duplicates else index.name)
+    
+    return added
 
 
 async def init_db():
     """初始化数据库表"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(_upgrade_schema)
+    
+    if added:
+        print(f"🔧 已补充字段/索引: {', '.join(added)}")
+        print("   如涉及计数字段，请运行: uv run python -m scripts.reconcile_counters")
+
+
+async def dispose_engines():
+    """关闭所有连接池（WAL 模式下最后一个连接关闭时会执行检查点）"""
+    for replica in replica_engines:
+        if replica is not engine:
+            await replica.dispose()
+    await engine.dispose()
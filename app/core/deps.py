@@ -5,83 +5,87 @@ from typing import Optional, Annotated
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.security import decode_token
 from app.models.user import User
+from app.services.principals import Principal, principal_cache
 
 
 security = HTTPBearer(auto_error=False)
 
 
+def _token_user_id(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[int]:
+    """从 token 中解析用户ID，无效时返回 None"""
+    if not credentials:
+        return None
+    
+    payload = decode_token(credentials.credentials)
+    if not payload:
+        return None
+    
+    user_id = payload.get("sub")
+    return int(user_id) if user_id else None
+
+
 async def get_current_user(
     credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(security)],
     db: Annotated[AsyncSession, Depends(get_db)]
-) -> User:
-    """获取当前登录用户"""
+) -> Principal:
+    """获取当前登录用户（身份信息取自缓存）"""
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="未授权,请先登录"
         )
     
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if not payload:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="无效的token"
-        )
-    
-    user_id = payload.get("sub")
-    if not user_id:
+    user_id = _token_user_id(credentials)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的token"
         )
     
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
-    
-    if not user or not user.is_active:
+    principal = await principal_cache.get(db, user_id)
+    if principal is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户不存在或已被禁用"
         )
     
-    return user
+    return principal
 
 
 async def get_current_user_optional(
     credentials: Annotated[Optional[HTTPAuthorizationCredentials], Depends(security)],
     db: Annotated[AsyncSession, Depends(get_db)]
-) -> Optional[User]:
+) -> Optional[Principal]:
     """获取当前用户（可选，不强制登录）"""
-    if not credentials:
-        return None
-    
-    token = credentials.credentials
-    payload = decode_token(token)
-    
-    if not payload:
+    user_id = _token_user_id(credentials)
+    if user_id is None:
         return None
     
-    user_id = payload.get("sub")
-    if not user_id:
-        return None
-    
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
-    
-    return user if user and user.is_active else None
+    return await principal_cache.get(db, user_id)
 
 
-async def get_admin_user(
-    current_user: Annotated[User, Depends(get_current_user)]
+async def get_current_account(
+    current_user: Annotated[Principal, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
 ) -> User:
+    """获取当前用户的完整记录（修改资料、密码、设置等需要读写 users 行的接口使用）"""
+    user = await db.get(User, current_user.id)
+    if not user or not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="用户不存在或已被禁用"
+        )
+    return user
+
+
+async def get_admin_user(
+    current_user: Annotated[Principal, Depends(get_current_user)]
+) -> Principal:
     """获取管理员用户"""
     if not current_user.is_admin:
         raise HTTPException(
@@ -0,0 +1,58 @@
+"""
+ETag 条件请求工具模块
+
+ETag 由资源的版本信息（更新时间、计数、列表版本号等）计算，
+请求头 If-None-Match 匹配时直接返回 304，省去加载关联数据和序列化的开销。
+"""
+import hashlib
+import time
+from datetime import datetime
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.cache import response_cache
+from app.core.config import settings
+
+
+def make_etag(*parts: Any) -> str:
+    """根据版本信息生成强 ETag"""
+    raw = "|".join(
+        part.isoformat() if isinstance(part, datetime) else str(part)
+        for part in parts
+    )
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"'
+
+
+def feed_etag(namespace: str, current_user_id: Optional[int], **params: Any) -> str:
+    """
+    列表接口的 ETag：列表版本号 + 查询参数 + 当前用户
+
+    浏览量变化不会递增列表版本号，因此再按缓存有效期划分时间段，
+    保证列表中的浏览量最多滞后一个缓存周期。
+    """
+    ttl = max(settings.RESPONSE_CACHE_TTL_SECONDS, 1)
+    return make_etag(
+        namespace,
+        response_cache.version(namespace),
+        response_cache.make_key(namespace, **params),
+        current_user_id or "guest",
+        int(time.time() // ttl),
+    )
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """判断请求头 If-None-Match 是否与 ETag 匹配"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    if "*" in candidates:
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """304 响应"""
+    return Response(status_code=304, headers={"ETag": etag})
@@ -0,0 +1,246 @@
+"""
+登录限流模块 - 按客户端 IP 和用户名统计登录失败次数，超限后指数退避锁定
+
+在滑动窗口（LOGIN_FAILURE_WINDOW_SECONDS）内失败次数达到阈值即锁定，第 n 次锁定
+时长为 LOGIN_LOCKOUT_BASE_SECONDS * 2^(n-1)，不超过 LOGIN_LOCKOUT_MAX_SECONDS；
+锁定结束后一个窗口内再次触发会继续翻倍。
+
+每次登录在 bcrypt 校验之前为 IP 和用户名各占用一个尝试名额：进行中的尝试数有上限，
+且与窗口内失败次数合计不超过失败阈值，校验结束后释放。并发的暴力请求因此无法在
+第一次失败记录之前一起通过检查、占满密码哈希线程池；被拒绝的请求直接返回 429。
+
+默认使用进程内存储，多进程部署可实现 ThrottleStore 接入共享存储（如 Redis），
+使各进程共享失败计数和锁定状态。
+"""
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+# 限流维度
+IP = "ip"
+USERNAME = "username"
+
+
+@dataclass(slots=True)
+class ThrottleEntry:
+    """单个限流键的状态"""
+    failures: list[float] = field(default_factory=list)  # 窗口内失败时间戳
+    locked_until: float = 0.0
+    lockouts: int = 0  # 连续锁定次数，决定下次锁定时长
+    in_flight: int = 0  # 已占用名额、尚未结束的尝试数
+
+
+class ThrottleStore(ABC):
+    """限流状态存储接口（时间戳使用 time.time()，便于多进程共享）"""
+    
+    @abstractmethod
+    def get(self, key: str) -> Optional[ThrottleEntry]:
+        """读取限流状态，不存在或已过期时返回 None"""
+    
+    @abstractmethod
+    def set(self, key: str, entry: ThrottleEntry, ttl: float) -> None:
+        """写入限流状态，ttl 秒后过期"""
+    
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """删除限流状态"""
+    
+    @abstractmethod
+    def size(self) -> int:
+        """当前记录的键数量"""
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """进程内 LRU + TTL 存储"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, ThrottleEntry]] = OrderedDict()
+    
+    def get(self, key: str) -> Optional[ThrottleEntry]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, entry = item
+        if expires_at < time.time():
+            del self._data[key]
+            return None
+        return entry
+    
+    def set(self, key: str, entry: ThrottleEntry, ttl: float) -> None:
+        self._data[key] = (time.time() + ttl, entry)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+    
+    def size(self) -> int:
+        return len(self._data)
+
+
+class LoginAttempt:
+    """一次登录尝试占用的名额，退出时释放并按结果记录失败或成功"""
+    
+    def __init__(self, throttle: "LoginThrottle", ip: str, username: str):
+        self.throttle = throttle
+        self.ip = ip
+        self.username = username
+        self.outcome: Optional[bool] = None
+    
+    def fail(self) -> None:
+        """用户名或密码错误"""
+        self.outcome = False
+    
+    def succeed(self) -> None:
+        """密码校验通过"""
+        self.outcome = True
+    
+    def __enter__(self) -> "LoginAttempt":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        # 未标记结果（如哈希线程池繁忙返回 503）时只释放名额
+        self.throttle._release(self.ip, self.username, self.outcome)
+
+
+class LoginThrottle:
+    """登录失败限流"""
+    
+    def __init__(
+        self,
+        store: ThrottleStore,
+        window: float,
+        max_failures: dict[str, int],
+        max_in_flight: dict[str, int],
+        base_lockout: float,
+        max_lockout: float,
+        enabled: bool = True,
+    ):
+        self.store = store
+        self.window = window
+        self.max_failures = max_failures
+        self.max_in_flight = max_in_flight
+        self.base_lockout = base_lockout
+        self.max_lockout = max_lockout
+        self.enabled = enabled
+        # 统计
+        self.failures = 0
+        self.lockouts = 0
+        self.rejected = {IP: 0, USERNAME: 0}
+    
+    @staticmethod
+    def client_ip(request: Request) -> str:
+        """客户端 IP（部署在反向代理后时需让 uvicorn 开启 --proxy-headers）"""
+        return request.client.host if request.client else "unknown"
+    
+    @staticmethod
+    def _keys(ip: str, username: str) -> dict[str, str]:
+        return {IP: f"{IP}:{ip}", USERNAME: f"{USERNAME}:{username.strip().lower()}"}
+    
+    def _ttl(self, entry: ThrottleEntry, now: float) -> float:
+        # 锁定结束后保留一个窗口，期间再次触发锁定时长继续翻倍
+        return max(entry.locked_until - now, 0) + self.window
+    
+    def _reject(self, kind: str, detail: str, retry_after: int) -> HTTPException:
+        self.rejected[kind] += 1
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+    
+    def attempt(self, ip: str, username: str) -> LoginAttempt:
+        """在校验密码前为 IP 和用户名各占用一个尝试名额，没有名额时返回 429"""
+        if not self.enabled:
+            return LoginAttempt(self, ip, username)
+        
+        now = time.time()
+        keys = self._keys(ip, username)
+        entries = {}
+        for kind, key in keys.items():
+            entry = self.store.get(key) or ThrottleEntry()
+            entry.failures = [at for at in entry.failures if at > now - self.window]
+            if entry.locked_until > now:
+                retry_after = math.ceil(entry.locked_until - now)
+                raise self._reject(kind, f"登录失败次数过多，请 {retry_after} 秒后再试", retry_after)
+            # 进行中的尝试可能全部失败，与已有失败合计不能超过阈值
+            if (
+                entry.in_flight >= self.max_in_flight[kind]
+                or len(entry.failures) + entry.in_flight >= self.max_failures[kind]
+            ):
+                raise self._reject(kind, "登录请求过于频繁，请稍后再试", 1)
+            entries[kind] = entry
+        
+        for kind, entry in entries.items():
+            entry.in_flight += 1
+            self.store.set(keys[kind], entry, self._ttl(entry, now))
+        return LoginAttempt(self, ip, username)
+    
+    def _release(self, ip: str, username: str, outcome: Optional[bool]) -> None:
+        """释放尝试名额；outcome 为 False 时记录失败并在达到阈值时锁定，为 True 时清除用户名的失败记录"""
+        if not self.enabled:
+            return
+        
+        now = time.time()
+        if outcome is False:
+            self.failures += 1
+        for kind, key in self._keys(ip, username).items():
+            entry = self.store.get(key) or ThrottleEntry()
+            entry.in_flight = max(entry.in_flight - 1, 0)
+            entry.failures = [at for at in entry.failures if at > now - self.window]
+            
+            if outcome is False:
+                entry.failures.append(now)
+                if len(entry.failures) >= self.max_failures[kind]:
+                    duration = min(self.base_lockout * 2 ** entry.lockouts, self.max_lockout)
+                    entry.locked_until = now + duration
+                    entry.lockouts += 1
+                    entry.failures = []
+                    self.lockouts += 1
+            elif outcome and kind == USERNAME:
+                # 登录成功后清除该用户名的失败记录（IP 记录保留，避免用自己的账号刷新计数）
+                entry.failures = []
+                entry.lockouts = 0
+            
+            if entry.in_flight or entry.failures or entry.locked_until > now or entry.lockouts:
+                self.store.set(key, entry, self._ttl(entry, now))
+            else:
+                self.store.delete(key)
+    
+    def stats(self) -> dict:
+        """失败、锁定和拒绝次数统计"""
+        return {
+            "enabled": self.enabled,
+            "entries": self.store.size(),
+            "failures": self.failures,
+            "lockouts": self.lockouts,
+            "rejectedByIp": self.rejected[IP],
+            "rejectedByUsername": self.rejected[USERNAME],
+        }
+
+
+# 全局登录限流实例
+login_throttle = LoginThrottle(
+    MemoryThrottleStore(settings.LOGIN_THROTTLE_MAX_ENTRIES),
+    window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+    max_failures={
+        IP: settings.LOGIN_MAX_FAILURES_PER_IP,
+        USERNAME: settings.LOGIN_MAX_FAILURES_PER_USERNAME,
+    },
+    max_in_flight={
+        IP: settings.LOGIN_MAX_IN_FLIGHT_PER_IP,
+        USERNAME: settings.LOGIN_MAX_IN_FLIGHT_PER_USERNAME,
+    },
+    base_lockout=settings.LOGIN_LOCKOUT_BASE_SECONDS,
+    max_lockout=settings.LOGIN_LOCKOUT_MAX_SECONDS,
+    enabled=settings.LOGIN_THROTTLE_ENABLED,
+)
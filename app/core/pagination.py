@@ -0,0 +1,60 @@
+"""
+游标分页工具模块
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+
+T = TypeVar("T")
+
+
+def encode_cursor(*values: Any) -> str:
+    """将排序键编码为不透明游标"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> tuple:
+    """解码游标，types 指定每个排序键的类型"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError("cursor length mismatch")
+        return tuple(
+            datetime.fromisoformat(value) if value_type is datetime else value_type(value)
+            for value, value_type in zip(payload, types)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的分页游标"
+        )
+
+
+def keyset_before(columns: Sequence, values: Sequence):
+    """降序排列时，取位于游标之后的行: (col1, col2, ...) < (v1, v2, ...)"""
+    return tuple_(*columns) < tuple_(*values)
+
+
+def keyset_after(columns: Sequence, values: Sequence):
+    """升序排列时，取位于游标之后的行: (col1, col2, ...) > (v1, v2, ...)"""
+    return tuple_(*columns) > tuple_(*values)
+
+
+def split_page(
+    rows: Sequence[T],
+    limit: int,
+    key: Callable[[T], tuple]
+) -> tuple[list[T], Optional[str]]:
+    """按 limit+1 的查询结果切分当前页，并生成下一页游标"""
+    items = list(rows[:limit])
+    if len(rows) > limit and items:
+        return items, encode_cursor(*key(items[-1]))
+    return items, None
@@ -0,0 +1,38 @@
+"""
+JSON 响应模块 - 基于 orjson 的快速序列化
+
+orjson 原生支持 datetime（输出与 isoformat 一致）、dict/list 等类型，
+序列化速度远高于标准库 json。路由直接返回 FastJSONResponse 时还能跳过
+FastAPI 对返回值的 jsonable_encoder 递归转换。
+"""
+from typing import Any, Mapping, Optional
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """orjson 不支持的类型"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
+
+
+def dump_json(content: Any) -> bytes:
+    """序列化为 JSON 字节串"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 orjson 序列化的 JSON 响应（应用默认响应类）"""
+    
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+
+def json_response(content: Any, headers: Optional[Mapping[str, str]] = None) -> FastJSONResponse:
+    """直接构造响应，跳过 FastAPI 的 jsonable_encoder"""
+    return FastJSONResponse(content, headers=headers)
@@ -1,17 +1,27 @@
 """
 安全相关工具模块
+
+bcrypt 每次计算耗时上百毫秒，接口中通过 password_hasher 在专用线程池里执行
+（bcrypt 计算时释放 GIL），不阻塞事件循环；同步的 verify_password /
+get_password_hash 供脚本使用。
 """
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Callable, Optional, TypeVar
 
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
+T = TypeVar("T")
+
 
-# 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 密码加密上下文（成本与配置不一致的哈希会被标记为需要更新）
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,6 +34,83 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """在有界线程池中执行 bcrypt 计算"""
+    
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        # 统计
+        self.completed = 0
+        self.rejected = 0
+        self.max_depth = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+    
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="服务繁忙，请稍后重试"
+            )
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        
+        self._pending += 1
+        self.max_depth = max(self.max_depth, self._pending)
+        started = time.monotonic()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            elapsed = time.monotonic() - started
+            self.completed += 1
+            self.total_time += elapsed
+            self.max_time = max(self.max_time, elapsed)
+    
+    async def hash(self, password: str) -> str:
+        """计算密码哈希值"""
+        return await self._run(pwd_context.hash, password)
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """验证密码"""
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+    
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """验证密码，哈希成本与配置不一致时同时返回按新成本计算的哈希值"""
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+    
+    def shutdown(self) -> None:
+        """关闭线程池（应用关闭时调用，之后再次使用时重新创建）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def stats(self) -> dict:
+        """排队深度和耗时统计（耗时包含排队时间）"""
+        return {
+            "workers": self.workers,
+            "rounds": settings.BCRYPT_ROUNDS,
+            "pending": self._pending,
+            "maxPending": self.max_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avgMs": round(self.total_time / self.completed * 1000, 2) if self.completed else 0.0,
+            "maxMs": round(self.max_time * 1000, 2),
+        }
+
+
+# 全局密码哈希线程池
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建访问令牌"""
     to_encode = data.copy()
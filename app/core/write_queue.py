@@ -0,0 +1,180 @@
+"""
+单写者写入队列
+
+SQLite 同一时刻只允许一个写事务，点赞、收藏、关注、评论等小写入在突发流量下
+会互相争抢写锁。接入队列的路由把写操作提交给后台写入任务，由它把队列中积压的
+多个操作合并到同一个事务中执行（每个操作使用独立的 SAVEPOINT，失败互不影响），
+提交后再通过 Future 把各自的结果或异常交还给请求。
+
+队列积压超过 WRITE_QUEUE_MAX_PENDING 时直接返回 503；后台任务未运行（如脚本中）
+或队列被关闭时，写操作在请求自己的会话中执行。
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+WriteOperation = Callable[[AsyncSession], Awaitable[T]]
+
+
+@dataclass
+class _PendingWrite:
+    operation: WriteOperation
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class WriteQueue:
+    """后台批量写入队列"""
+    
+    def __init__(self, max_batch: int, max_pending: int, enabled: bool = True):
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.enabled = enabled
+        self._queue: asyncio.Queue[_PendingWrite] = asyncio.Queue()
+        self._running = False
+        self._in_flight: Optional[asyncio.Task] = None  # 正在执行的批次
+        # 统计
+        self.batches = 0
+        self.items = 0
+        self.max_batch_size = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    async def run(self, db: AsyncSession, operation: WriteOperation[T]) -> T:
+        """执行写操作：队列可用时交给后台写入任务，否则在当前会话中执行"""
+        if not (self.enabled and self._running):
+            return await operation(db)
+        
+        # 排队期间归还请求会话的连接（此前只做过读取，会话对象提交后不过期），
+        # 避免大量排队请求占满连接池，使写入任务拿不到连接
+        await db.commit()
+        return await self.submit(operation)
+    
+    async def submit(self, operation: WriteOperation[T]) -> T:
+        """提交写操作并等待其所在批次提交"""
+        if self._queue.qsize() >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="写入繁忙，请稍后重试"
+            )
+        
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait(_PendingWrite(operation, future))
+        return await future
+    
+    def _take_batch(self, first: _PendingWrite) -> list[_PendingWrite]:
+        batch = [first]
+        while len(batch) < self.max_batch and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+    
+    async def _execute(self, batch: list[_PendingWrite]) -> None:
+        """在一个事务中执行一批写操作"""
+        started = time.monotonic()
+        for item in batch:
+            wait = started - item.enqueued_at
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        self.batches += 1
+        self.items += len(batch)
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        
+        outcomes: list[tuple[_PendingWrite, Any, Optional[Exception]]] = []
+        try:
+            async with AsyncSessionLocal() as db:
+                if engine.dialect.name == "sqlite":
+                    # 批次开始即获取写锁：SAVEPOINT 会提前开启读快照，若等到第一次写入时
+                    # 再升级，期间有其他连接提交就会直接报 database is locked
+                    await db.execute(text("BEGIN IMMEDIATE"))
+                for item in batch:
+                    if item.future.done():
+                        # 请求已取消，不再执行
+                        continue
+                    try:
+                        async with db.begin_nested():
+                            result = await item.operation(db)
+                    except Exception as exc:
+                        outcomes.append((item, None, exc))
+                    else:
+                        outcomes.append((item, result, None))
+                await db.commit()
+        except Exception as exc:
+            logger.exception("写入批次提交失败（%d 个操作）", len(batch))
+            self.failed += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(exc)
+            return
+        
+        for item, result, exc in outcomes:
+            if item.future.done():
+                continue
+            if exc is not None:
+                self.failed += 1
+                item.future.set_exception(exc)
+            else:
+                item.future.set_result(result)
+    
+    async def drain(self) -> None:
+        """执行队列中剩余的写操作（应用关闭时调用）"""
+        self._running = False
+        if self._in_flight is not None:
+            # 后台任务被取消时正在执行的批次不会中断，先等待其提交
+            await self._in_flight
+            self._in_flight = None
+        while not self._queue.empty():
+            await self._execute(self._take_batch(self._queue.get_nowait()))
+    
+    async def run_worker(self) -> None:
+        """后台任务：逐批执行队列中的写操作"""
+        self._running = True
+        try:
+            while True:
+                first = await self._queue.get()
+                # 已出队的操作只存在于批次中，取消后台任务时不能随之丢弃：
+                # 批次在独立任务中执行并用 shield 隔离取消，由 drain 等待其完成
+                self._in_flight = asyncio.create_task(self._execute(self._take_batch(first)))
+                await asyncio.shield(self._in_flight)
+                self._in_flight = None
+        finally:
+            self._running = False
+    
+    def stats(self) -> dict:
+        """批次大小和排队时间统计"""
+        return {
+            "enabled": self.enabled,
+            "running": self._running,
+            "pending": self._queue.qsize(),
+            "batches": self.batches,
+            "items": self.items,
+            "avgBatchSize": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "maxBatchSize": self.max_batch_size,
+            "avgWaitMs": round(self.total_wait / self.items * 1000, 2) if self.items else 0.0,
+            "maxWaitMs": round(self.max_wait * 1000, 2),
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+
+# 全局写入队列实例
+write_queue = WriteQueue(
+    max_batch=settings.WRITE_QUEUE_MAX_BATCH,
+    max_pending=settings.WRITE_QUEUE_MAX_PENDING,
+    enabled=settings.WRITE_QUEUE_ENABLED,
+)
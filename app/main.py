@@ -1,16 +1,24 @@
 """
 动漫Hub API - 主入口文件
 """
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
 import os
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, dispose_engines, read_router
+from app.core.responses import FastJSONResponse
+from app.core.security import password_hasher
+from app.core.write_queue import write_queue
 from app.api.router import api_router
+from app.services.excerpts import backfill_excerpts
+from app.services.hot_rank import run_hot_score_refresher
+from app.services.search import init_search_index
+from app.services.timeline import timeline_fanout
+from app.services.view_counter import view_buffer
 
 
 @asynccontextmanager
@@ -18,10 +26,33 @@ async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时初始化数据库
     await init_db()
+    await init_search_index()
+    await backfill_excerpts()
     
     # 创建上传目录
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
+    # 启动热度分定期衰减任务
+    hot_score_task = asyncio.create_task(
+        run_hot_score_refresher(settings.HOT_SCORE_REFRESH_SECONDS)
+    )
+    
+    # 启动浏览量批量写回任务
+    view_flush_task = asyncio.create_task(
+        view_buffer.run_flusher(settings.VIEW_FLUSH_SECONDS)
+    )
+    
+    # 启动关注时间线扇出任务
+    fanout_task = asyncio.create_task(timeline_fanout.run_worker())
+    
+    # 启动单写者写入队列
+    write_task = asyncio.create_task(write_queue.run_worker())
+    
+    # 启动只读副本健康检查任务
+    replica_check_task = asyncio.create_task(
+        read_router.run_health_checks(settings.DB_REPLICA_HEALTH_CHECK_SECONDS)
+    )
+    
     print(f"🚀 {settings.APP_NAME} v{settings.APP_VERSION} 启动成功!")
     print(f"📚 API文档: http://localhost:8080/docs")
     print(f"🔧 数据库: {settings.DATABASE_URL}")
@@ -29,6 +60,26 @@ async def lifespan(app: FastAPI):
     yield
     
     # 关闭时的清理工作
+    for task in (hot_score_task, view_flush_task, fanout_task, write_task, replica_check_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    
+    # 执行队列中剩余的写操作
+    await write_queue.drain()
+    
+    # 写回缓冲区中剩余的浏览量
+    await view_buffer.flush()
+    
+    # 处理尚未扇出的帖子
+    await timeline_fanout.drain()
+    
+    # 关闭数据库连接池
+    await dispose_engines()
+    
+    # 关闭密码哈希线程池
+    password_hasher.shutdown()
+    
     print("👋 服务器关闭")
 
 
@@ -38,6 +89,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="动漫Hub后端API服务 - 一个动漫爱好者交流平台",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -57,20 +109,21 @@ app.add_middleware(
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
     """HTTP异常处理"""
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=exc.status_code,
         content={
             "code": exc.status_code,
             "message": exc.detail,
             "data": None
-        }
+        },
+        headers=exc.headers
     )
 
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """通用异常处理"""
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=500,
         content={
             "code": 500,
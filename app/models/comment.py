@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import Text, Integer, DateTime, ForeignKey
+from sqlalchemy import Text, Integer, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -18,6 +18,15 @@ if TYPE_CHECKING:
 class Comment(Base):
     """评论模型"""
     __tablename__ = "comments"
+    __table_args__ = (
+        # 帖子评论分页（按时间 / 按点赞数）
+        Index("ix_comments_post_created_at_id", "post_id", "created_at", "id"),
+        Index("ix_comments_post_like_count_id", "post_id", "like_count", "id"),
+        # 删除账号时按作者查找评论
+        Index("ix_comments_author_id", "author_id"),
+        # 后台评论列表按时间排序、今日评论数统计
+        Index("ix_comments_created_at", "created_at"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     content: Mapped[str] = mapped_column(Text, nullable=False)
@@ -25,6 +34,9 @@ class Comment(Base):
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     post_id: Mapped[int] = mapped_column(ForeignKey("posts.id"), nullable=False)
     
+    # 点赞计数（冗余字段）
+    like_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         default=now_beijing
@@ -39,6 +51,11 @@ class Comment(Base):
 class CommentLike(Base):
     """评论点赞模型"""
     __tablename__ = "comment_likes"
+    __table_args__ = (
+        # 每个用户对同一评论只能点赞一次（同时用于点赞状态查询）
+        Index("uq_comment_likes_comment_user", "comment_id", "user_id", unique=True),
+        Index("ix_comment_likes_user_id", "user_id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -4,9 +4,10 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import String, Text, Integer, DateTime, ForeignKey, JSON
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import String, Text, Integer, Float, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
+from app.core.config import settings
 from app.core.database import Base
 from app.core.timezone import now_beijing
 
@@ -15,16 +16,41 @@ if TYPE_CHECKING:
     from app.models.comment import Comment
 
 
+def make_excerpt(content: str) -> str:
+    """生成帖子摘要：合并空白字符，超出 POST_EXCERPT_LENGTH 时截断"""
+    text = " ".join(content.split())
+    if len(text) <= settings.POST_EXCERPT_LENGTH:
+        return text
+    return text[:settings.POST_EXCERPT_LENGTH].rstrip() + "…"
+
+
 class Post(Base):
     """帖子模型"""
     __tablename__ = "posts"
+    __table_args__ = (
+        # 游标分页用的覆盖索引
+        Index("ix_posts_created_at_id", "created_at", "id"),
+        Index("ix_posts_author_created_at_id", "author_id", "created_at", "id"),
+        # 热门帖子按热度分读取
+        Index("ix_posts_hot_score_id", "hot_score", "id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
+    # 列表页使用的摘要，随 content 写入时生成（见 _sync_excerpt）
+    excerpt: Mapped[str] = mapped_column(String(500), default="", server_default="")
     images: Mapped[Optional[list]] = mapped_column(JSON, default=list)
     view_count: Mapped[int] = mapped_column(Integer, default=0)
     
+    # 互动计数（冗余字段，随点赞/评论/收藏在同一事务内维护）
+    like_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    comment_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    favorite_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    
+    # 时间衰减热度分（见 app/services/hot_rank.py）
+    hot_score: Mapped[float] = mapped_column(Float, default=0, server_default="0")
+    
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     
     created_at: Mapped[datetime] = mapped_column(
@@ -42,11 +68,22 @@ class Post(Base):
     comments: Mapped[list["Comment"]] = relationship("Comment", back_populates="post", cascade="all, delete-orphan")
     likes: Mapped[list["PostLike"]] = relationship("PostLike", back_populates="post", cascade="all, delete-orphan")
     favorites: Mapped[list["PostFavorite"]] = relationship("PostFavorite", back_populates="post", cascade="all, delete-orphan")
+    
+    @validates("content")
+    def _sync_excerpt(self, key: str, content: str) -> str:
+        """写入正文时同步更新摘要"""
+        self.excerpt = make_excerpt(content)
+        return content
 
 
 class PostLike(Base):
     """帖子点赞模型"""
     __tablename__ = "post_likes"
+    __table_args__ = (
+        # 每个用户对同一帖子只能点赞一次（同时用于点赞状态查询）
+        Index("uq_post_likes_post_user", "post_id", "user_id", unique=True),
+        Index("ix_post_likes_user_id", "user_id"),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
@@ -64,6 +101,11 @@ class PostLike(Base):
 class PostFavorite(Base):
     """帖子收藏模型"""
     __tablename__ = "post_favorites"
+    __table_args__ = (
+        Index("ix_post_favorites_user_created_at_id", "user_id", "created_at", "id"),
+        # 每个用户对同一帖子只能收藏一次
+        Index("uq_post_favorites_post_user", "post_id", "user_id", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
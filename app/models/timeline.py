@@ -0,0 +1,28 @@
+"""
+数据库模型 - 关注时间线
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class TimelineEntry(Base):
+    """时间线收件箱模型 - 发帖时写入每个关注者的收件箱"""
+    __tablename__ = "timeline_entries"
+    __table_args__ = (
+        UniqueConstraint("user_id", "post_id", name="uq_timeline_entries_user_post"),
+        # 按收件人游标分页读取
+        Index("ix_timeline_entries_user_created_at_post", "user_id", "created_at", "post_id"),
+        # 取消关注时按作者清理
+        Index("ix_timeline_entries_user_author", "user_id", "author_id"),
+    )
+    
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    post_id: Mapped[int] = mapped_column(ForeignKey("posts.id", ondelete="CASCADE"), index=True, nullable=False)
+    author_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # 冗余帖子发布时间，用于排序
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,15 @@
+"""
+数据库模型 - 总数计数
+"""
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class TotalCount(Base):
+    """总数计数模型 - 分页接口的 total 由写操作增量维护，避免每次 count(*)"""
+    __tablename__ = "total_counts"
+    
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    value: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
@@ -4,7 +4,7 @@
 from datetime import datetime
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import String, Boolean, Text, DateTime, Integer, ForeignKey
+from sqlalchemy import String, Boolean, Text, DateTime, Integer, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -74,6 +74,10 @@ class User(Base):
 class Follow(Base):
     """关注关系模型"""
     __tablename__ = "follows"
+    __table_args__ = (
+        # 同一关注关系只能存在一次
+        Index("uq_follows_follower_following", "follower_id", "following_id", unique=True),
+    )
     
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     follower_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True, nullable=False)
@@ -52,6 +52,7 @@ class PostResponse(BaseModel):
     commentCount: int = 0
     viewCount: int = 0
     isLiked: bool = False
+    isFavorited: bool = False
     createdAt: datetime
     updatedAt: datetime
     comments: list[CommentInPost] = []
@@ -71,6 +72,7 @@ class PostListResponse(BaseModel):
     commentCount: int = 0
     viewCount: int = 0
     isLiked: bool = False
+    isFavorited: bool = False
     createdAt: datetime
     updatedAt: datetime
     comments: list = []
@@ -0,0 +1,110 @@
+"""
+作者摘要缓存服务
+
+帖子列表只需要作者的 id/用户名/邮箱/头像/注册时间，活跃作者在各页反复出现。
+这里用进程内 LRU 缓存这些小字典，未命中的作者一次性批量查询（只查所需列，
+不加载 hashed_password 等字段）。用户修改资料或头像后，在事务提交时失效。
+"""
+from collections import OrderedDict
+from typing import Iterable
+
+from sqlalchemy import select, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+
+# session.info 中保存待失效作者的键
+_PENDING_KEY = "author_invalidations"
+
+
+def author_summary(user: User) -> dict:
+    """由 User 对象构造作者摘要"""
+    return {
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "avatar": user.get_avatar_url(),
+        "createdAt": user.created_at
+    }
+
+
+class AuthorSummaryCache:
+    """进程内作者摘要 LRU 缓存"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[int, dict] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    async def get_many(self, db: AsyncSession, user_ids: Iterable[int]) -> dict[int, dict]:
+        """批量获取作者摘要，未命中的一次查询补齐"""
+        summaries: dict[int, dict] = {}
+        missing = []
+        for user_id in set(user_ids):
+            summary = self._data.get(user_id)
+            if summary is None:
+                missing.append(user_id)
+            else:
+                self._data.move_to_end(user_id)
+                summaries[user_id] = summary
+        self.hits += len(summaries)
+        self.misses += len(missing)
+        
+        if missing:
+            result = await db.execute(
+                select(User.id, User.username, User.email, User.avatar, User.created_at)
+                .where(User.id.in_(missing))
+            )
+            for row in result.all():
+                summary = author_summary(User(**row._mapping))
+                summaries[row.id] = summary
+                self._put(row.id, summary)
+        
+        return summaries
+    
+    def _put(self, user_id: int, summary: dict) -> None:
+        self._data[user_id] = summary
+        self._data.move_to_end(user_id)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def invalidate(self, user_id: int) -> None:
+        """立即失效"""
+        self._data.pop(user_id, None)
+    
+    def schedule_invalidation(self, db: AsyncSession, user_id: int) -> None:
+        """登记在当前事务提交后失效的作者"""
+        db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+    
+    def stats(self) -> dict:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# 全局作者摘要缓存实例
+author_cache = AuthorSummaryCache(settings.AUTHOR_CACHE_MAX_ENTRIES)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        # SAVEPOINT 释放，等最外层事务提交
+        return
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        author_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,120 @@
+"""
+互动计数服务 - 维护帖子/评论上的冗余计数字段
+"""
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update, func, union
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import FEED_NAMESPACES, schedule_invalidation
+from app.models.post import Post, PostLike, PostFavorite
+from app.models.comment import Comment, CommentLike
+from app.services.hot_rank import refresh_hot_score, refresh_hot_scores
+from app.services.totals import COMMENTS, adjust_total
+
+
+async def adjust_post_counters(
+    db: AsyncSession,
+    post_id: int,
+    likes: int = 0,
+    comments: int = 0,
+    favorites: int = 0
+) -> None:
+    """增量更新帖子计数（与互动记录在同一事务内执行），并刷新热度分"""
+    values = {}
+    if likes:
+        values["like_count"] = Post.like_count + likes
+    if comments:
+        values["comment_count"] = Post.comment_count + comments
+    if favorites:
+        values["favorite_count"] = Post.favorite_count + favorites
+    if not values:
+        return
+    
+    # 计数变化不算帖子修改，保持 updated_at 不变
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(**values, updated_at=Post.updated_at)
+    )
+    await refresh_hot_score(db, post_id)
+    await adjust_total(db, COMMENTS, comments)
+    schedule_invalidation(db, *FEED_NAMESPACES)
+
+
+async def adjust_comment_likes(db: AsyncSession, comment_id: int, delta: int) -> None:
+    """增量更新评论点赞数"""
+    await db.execute(
+        update(Comment)
+        .where(Comment.id == comment_id)
+        .values(like_count=Comment.like_count + delta)
+    )
+
+
+def post_recount_stmt(post_ids: Optional[Iterable[int]] = None):
+    """按互动表重新统计帖子计数的UPDATE语句（post_ids为空时处理全表）"""
+    stmt = update(Post).values(
+        like_count=(
+            select(func.count(PostLike.id))
+            .where(PostLike.post_id == Post.id)
+            .scalar_subquery()
+        ),
+        comment_count=(
+            select(func.count(Comment.id))
+            .where(Comment.post_id == Post.id)
+            .scalar_subquery()
+        ),
+        favorite_count=(
+            select(func.count(PostFavorite.id))
+            .where(PostFavorite.post_id == Post.id)
+            .scalar_subquery()
+        ),
+        updated_at=Post.updated_at,
+    )
+    if post_ids is not None:
+        stmt = stmt.where(Post.id.in_(list(post_ids)))
+    return stmt.execution_options(synchronize_session=False)
+
+
+def comment_recount_stmt(comment_ids: Optional[Iterable[int]] = None):
+    """按点赞表重新统计评论点赞数的UPDATE语句（comment_ids为空时处理全表）"""
+    stmt = update(Comment).values(
+        like_count=(
+            select(func.count(CommentLike.id))
+            .where(CommentLike.comment_id == Comment.id)
+            .scalar_subquery()
+        )
+    )
+    if comment_ids is not None:
+        stmt = stmt.where(Comment.id.in_(list(comment_ids)))
+    return stmt.execution_options(synchronize_session=False)
+
+
+def user_touched_posts_query(user_id: int):
+    """用户点赞/收藏/评论过的帖子ID查询（删除用户后需要重新统计）"""
+    return union(
+        select(PostLike.post_id).where(PostLike.user_id == user_id),
+        select(PostFavorite.post_id).where(PostFavorite.user_id == user_id),
+        select(Comment.post_id).where(Comment.author_id == user_id),
+    )
+
+
+def user_touched_comments_query(user_id: int):
+    """用户点赞过的评论ID查询"""
+    return select(CommentLike.comment_id).where(CommentLike.user_id == user_id)
+
+
+async def recount_posts(db: AsyncSession, post_ids: Iterable[int]) -> None:
+    """重新统计指定帖子的计数"""
+    post_ids = list(post_ids)
+    if post_ids:
+        await db.execute(post_recount_stmt(post_ids))
+        await refresh_hot_scores(db, post_ids)
+        schedule_invalidation(db, *FEED_NAMESPACES)
+
+
+async def recount_comments(db: AsyncSession, comment_ids: Iterable[int]) -> None:
+    """重新统计指定评论的点赞数"""
+    comment_ids = list(comment_ids)
+    if comment_ids:
+        await db.execute(comment_recount_stmt(comment_ids))
@@ -0,0 +1,49 @@
+"""
+帖子摘要回填服务 - 为新增 excerpt 字段之前发布的帖子生成摘要
+"""
+import logging
+
+from sqlalchemy import select, update, bindparam
+
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post, make_excerpt
+
+logger = logging.getLogger(__name__)
+
+# 每批回填的帖子数
+BACKFILL_BATCH_SIZE = 500
+
+
+async def backfill_excerpts() -> int:
+    """为摘要为空的帖子生成摘要，返回回填数量"""
+    update_stmt = (
+        update(Post.__table__)
+        .where(Post.__table__.c.id == bindparam("post_id"))
+        .values(excerpt=bindparam("excerpt"), updated_at=Post.__table__.c.updated_at)
+    )
+    
+    total = 0
+    last_id = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(
+                select(Post.id, Post.content)
+                .where(Post.excerpt == "", Post.content != "", Post.id > last_id)
+                .order_by(Post.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            )
+            rows = result.all()
+            if not rows:
+                break
+            
+            await db.execute(
+                update_stmt,
+                [{"post_id": row.id, "excerpt": make_excerpt(row.content)} for row in rows]
+            )
+            total += len(rows)
+            last_id = rows[-1].id
+        await db.commit()
+    
+    if total:
+        logger.info("已为 %d 个帖子生成摘要", total)
+    return total
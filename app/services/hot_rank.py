@@ -0,0 +1,181 @@
+"""
+热度排名服务 - 基于时间衰减的帖子热度分（Hacker News 风格）
+
+score = (点赞*w + 评论*w + 收藏*w + 浏览*w) / (发布小时数 + 2) ^ gravity
+
+互动发生时增量刷新单个帖子的分数，后台任务定期对时间窗口内的帖子重新衰减，
+窗口外的帖子分数归零，/posts/hot 只需按 (hot_score, id) 索引顺序读取。
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import schedule_invalidation
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.timezone import now_beijing, BEIJING_TZ
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# 各类互动的权重
+LIKE_WEIGHT = 3.0
+COMMENT_WEIGHT = 2.0
+FAVORITE_WEIGHT = 4.0
+VIEW_WEIGHT = 0.05
+
+# 低于该值的分数视为 0，不再参与后续衰减
+MIN_SCORE = 1e-6
+
+# 定期衰减和批量刷新时每批处理的帖子数
+REDECAY_BATCH_SIZE = 500
+
+# 按主键写入热度分（executemany）
+_SCORE_UPDATE = (
+    update(Post.__table__)
+    .where(Post.__table__.c.id == bindparam("post_id"))
+    .values(hot_score=bindparam("score"), updated_at=Post.__table__.c.updated_at)
+)
+
+# 计算热度分所需的字段
+_SCORE_COLUMNS = (
+    Post.id,
+    Post.like_count,
+    Post.comment_count,
+    Post.favorite_count,
+    Post.view_count,
+    Post.created_at
+)
+
+
+def compute_hot_score(
+    likes: int,
+    comments: int,
+    favorites: int,
+    views: int,
+    created_at: datetime,
+    now: Optional[datetime] = None
+) -> float:
+    """计算帖子热度分"""
+    now = now or now_beijing()
+    if created_at.tzinfo is None:
+        # 数据库中的时间按北京时间写入
+        created_at = created_at.replace(tzinfo=BEIJING_TZ)
+    age_hours = max((now - created_at).total_seconds() / 3600, 0.0)
+    
+    weight = (
+        likes * LIKE_WEIGHT
+        + comments * COMMENT_WEIGHT
+        + favorites * FAVORITE_WEIGHT
+        + views * VIEW_WEIGHT
+    )
+    score = weight / (age_hours + 2) ** settings.HOT_SCORE_GRAVITY
+    return score if score >= MIN_SCORE else 0.0
+
+
+def score_post(post: Post, now: Optional[datetime] = None) -> float:
+    """根据帖子当前计数计算热度分"""
+    return compute_hot_score(
+        post.like_count or 0,
+        post.comment_count or 0,
+        post.favorite_count or 0,
+        post.view_count or 0,
+        post.created_at,
+        now
+    )
+
+
+async def refresh_hot_score(db: AsyncSession, post_id: int) -> None:
+    """互动发生后增量刷新单个帖子的热度分"""
+    result = await db.execute(
+        select(
+            Post.like_count,
+            Post.comment_count,
+            Post.favorite_count,
+            Post.view_count,
+            Post.created_at
+        ).where(Post.id == post_id)
+    )
+    row = result.one_or_none()
+    if not row:
+        return
+    
+    await db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values(hot_score=compute_hot_score(*row), updated_at=Post.updated_at)
+    )
+
+
+async def refresh_hot_scores(db: AsyncSession, post_ids: Iterable[int]) -> None:
+    """批量刷新多个帖子的热度分：每批一次查询计数、一次 executemany 写入"""
+    post_ids = list(post_ids)
+    now = now_beijing()
+    for start in range(0, len(post_ids), REDECAY_BATCH_SIZE):
+        result = await db.execute(
+            select(*_SCORE_COLUMNS).where(Post.id.in_(post_ids[start:start + REDECAY_BATCH_SIZE]))
+        )
+        params = [
+            {"post_id": row.id, "score": compute_hot_score(*row[1:], now=now)}
+            for row in result.all()
+        ]
+        if params:
+            await db.execute(_SCORE_UPDATE, params)
+
+
+async def redecay_hot_scores(db: AsyncSession) -> int:
+    """重新计算时间窗口内帖子的热度分，返回处理的帖子数"""
+    now = now_beijing()
+    cutoff = now - timedelta(days=settings.HOT_SCORE_WINDOW_DAYS)
+    
+    # 窗口外的帖子直接归零
+    await db.execute(
+        update(Post)
+        .where(Post.created_at < cutoff, Post.hot_score > 0)
+        .values(hot_score=0, updated_at=Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    
+    processed = 0
+    last_id = 0
+    while True:
+        result = await db.execute(
+            select(*_SCORE_COLUMNS)
+            .where(Post.created_at >= cutoff, Post.id > last_id)
+            .order_by(Post.id)
+            .limit(REDECAY_BATCH_SIZE)
+        )
+        rows = result.all()
+        if not rows:
+            break
+        
+        params = [
+            {"post_id": row.id, "score": compute_hot_score(*row[1:], now=now)}
+            for row in rows
+        ]
+        await db.execute(_SCORE_UPDATE, params)
+        processed += len(rows)
+        last_id = rows[-1].id
+    
+    schedule_invalidation(db, "hot")
+    return processed
+
+
+async def run_hot_score_refresher(interval: int) -> None:
+    """后台任务：定期重新衰减热度分"""
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                count = await redecay_hot_scores(db)
+                await db.commit()
+            logger.debug("热度分衰减完成，共 %d 个帖子", count)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("热度分衰减失败")
+        
+        await asyncio.sleep(interval)
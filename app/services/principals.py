@@ -0,0 +1,137 @@
+"""
+登录用户身份缓存服务
+
+每个带 token 的请求都要确认用户存在、未被禁用并取得管理员标记。这里把这些
+信息缓存为不可变的 Principal（不是 ORM 对象，可安全跨请求共享），短时间内
+同一用户的请求不再查询 users 表。
+
+服务内修改资料、头像、删除账号时在事务提交后立即失效。管理员身份不缓存，每次
+请求都重新查询：管理脚本在独立进程中取消管理员权限或禁用管理员时立即生效；
+普通用户被禁用或删除时，运行中的服务最迟在 PRINCIPAL_CACHE_TTL_SECONDS 秒后生效。
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import bindparam, select, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+
+# session.info 中保存待失效用户的键
+_PENDING_KEY = "principal_invalidations"
+
+# 按ID查询身份信息所需的列（预构建语句）
+_PRINCIPAL_BY_ID = select(
+    User.id,
+    User.username,
+    User.email,
+    User.avatar,
+    User.is_admin,
+    User.is_active,
+    User.created_at
+).where(User.id == bindparam("user_id"))
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """已登录用户的身份信息（只读快照）"""
+    id: int
+    username: str
+    email: str
+    avatar_url: str
+    is_admin: bool
+    created_at: datetime
+    
+    def get_avatar_url(self) -> str:
+        """获取头像URL"""
+        return self.avatar_url
+
+
+class PrincipalCache:
+    """进程内登录用户身份 LRU 缓存（带过期时间）"""
+    
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict[int, tuple[float, Principal]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    async def get(self, db: AsyncSession, user_id: int) -> Optional[Principal]:
+        """获取用户身份，用户不存在或已禁用时返回 None"""
+        entry = self._data.get(user_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        
+        result = await db.execute(_PRINCIPAL_BY_ID, {"user_id": user_id})
+        row = result.one_or_none()
+        if row is None or not row.is_active:
+            self._data.pop(user_id, None)
+            return None
+        
+        principal = Principal(
+            id=row.id,
+            username=row.username,
+            email=row.email,
+            avatar_url=User(username=row.username, avatar=row.avatar).get_avatar_url(),
+            is_admin=row.is_admin,
+            created_at=row.created_at
+        )
+        if principal.is_admin:
+            # 管理员权限可能被其他进程撤销，不缓存
+            self._data.pop(user_id, None)
+        else:
+            self._put(user_id, principal)
+        return principal
+    
+    def _put(self, user_id: int, principal: Principal) -> None:
+        self._data[user_id] = (time.monotonic() + self.ttl, principal)
+        self._data.move_to_end(user_id)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+    
+    def invalidate(self, user_id: int) -> None:
+        """立即失效"""
+        self._data.pop(user_id, None)
+    
+    def schedule_invalidation(self, db: AsyncSession, user_id: int) -> None:
+        """登记在当前事务提交后失效的用户"""
+        db.info.setdefault(_PENDING_KEY, set()).add(user_id)
+    
+    def stats(self) -> dict:
+        """命中统计"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+# 全局身份缓存实例
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_TTL_SECONDS, settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        # SAVEPOINT 释放，等最外层事务提交
+        return
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_PENDING_KEY, None)
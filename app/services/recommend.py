@@ -0,0 +1,98 @@
+"""
+推荐采样服务 - 基于带种子的伪随机置换按页抽取帖子
+
+把帖子ID空间 [1, domain] 看作一个序列，用以种子为密钥的 Feistel 网络
+（配合 cycle-walking）生成该序列的一个随机置换。第 N 个位置对应的帖子ID可以
+直接算出，因此每页只需按主键读取约 limit 条记录；同一种子下各页互不重叠且稳定。
+"""
+import hashlib
+import time
+from typing import Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.post import Post
+from app.services.principals import Principal
+
+# Feistel 轮数
+FEISTEL_ROUNDS = 4
+
+# 游标模式下为跳过已删除ID的空洞，最多追加查询的批次
+MAX_FILL_BATCHES = 4
+
+
+def default_seed(current_user: Optional[Principal]) -> int:
+    """生成默认种子：按用户区分，并在每个重排周期内保持不变"""
+    bucket = int(time.time() // settings.RECOMMEND_RESHUFFLE_SECONDS)
+    owner = current_user.id if current_user else "guest"
+    digest = hashlib.md5(f"{owner}_{bucket}".encode()).hexdigest()
+    return int(digest[:12], 16)
+
+
+def _round_value(value: int, round_index: int, seed: int, bits: int) -> int:
+    """Feistel 轮函数"""
+    digest = hashlib.blake2b(
+        f"{seed}:{round_index}:{value}".encode(),
+        digest_size=8
+    ).digest()
+    return int.from_bytes(digest, "big") & ((1 << bits) - 1)
+
+
+def permute(position: int, domain: int, seed: int) -> int:
+    """将 [0, domain) 内的位置映射为同一区间内的另一个位置（双射）"""
+    half_bits = max(((domain - 1).bit_length() + 1) // 2, 1)
+    mask = (1 << half_bits) - 1
+    
+    value = position
+    while True:
+        left, right = value >> half_bits, value & mask
+        for round_index in range(FEISTEL_ROUNDS):
+            left, right = right, left ^ _round_value(right, round_index, seed, half_bits)
+        value = (left << half_bits) | right
+        # cycle-walking：落在区间外时继续置换，直到回到 [0, domain)
+        if value < domain:
+            return value
+
+
+async def sample_posts(
+    db: AsyncSession,
+    seed: int,
+    domain: int,
+    start: int,
+    limit: int,
+    fill: bool = True,
+    options: Sequence = ()
+) -> tuple[list[Post], int]:
+    """
+    从置换序列的 start 位置开始抽取帖子，返回 (帖子列表, 下一个位置)
+    
+    fill=True 时会继续向后读取以补齐被删除帖子留下的空洞；
+    fill=False 时严格只读取 [start, start+limit) 区间，保证按页码访问时各页不重叠。
+    options 为附加的加载选项（如只返回摘要时延迟加载 content）。
+    """
+    posts: list[Post] = []
+    position = start
+    
+    for _ in range(MAX_FILL_BATCHES if fill else 1):
+        if position >= domain or len(posts) >= limit:
+            break
+        
+        batch_end = min(position + limit - len(posts), domain)
+        positions = range(position, batch_end)
+        post_ids = [permute(pos, domain, seed) + 1 for pos in positions]
+        
+        result = await db.execute(
+            select(Post)
+            .options(*options)
+            .where(Post.id.in_(post_ids))
+        )
+        posts_by_id = {post.id: post for post in result.scalars().all()}
+        
+        for post_id in post_ids:
+            if post_id in posts_by_id:
+                posts.append(posts_by_id[post_id])
+        position = batch_end
+    
+    return posts, position
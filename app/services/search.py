@@ -0,0 +1,262 @@
+"""
+全文搜索服务 - 基于 SQLite FTS5 的帖子标题/内容索引
+
+unicode61 分词器不会切分连续的中日韩文字，因此写入索引前先在 Python 中把
+CJK 字符串切成重叠的二元组（并在末尾补一个单字，支持单字前缀查询），
+查询时用同样的方式把关键词转换为短语查询，相邻二元组即可匹配任意长度的子串。
+
+索引在 create_post / update_post 时写入，删除由 posts 表上的触发器同步；
+启动时若索引与 posts 表条数不一致会自动重建。FTS5 不可用时返回 None，
+调用方回退到 LIKE 查询。
+
+PostgreSQL 下不建 FTS5 索引，而是启用 pg_trgm 扩展并为标题、正文和评论内容
+创建 GIN 三元组索引，LIKE/ILIKE '%关键词%' 查询可以直接走索引。
+"""
+import html
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import select, func, delete, insert, literal_column, table, column, Integer, Text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncConnection
+
+from app.core.database import engine
+from app.models.post import Post
+
+logger = logging.getLogger(__name__)
+
+# BM25 列权重（标题匹配更重要）
+TITLE_WEIGHT = 10.0
+CONTENT_WEIGHT = 1.0
+
+# 摘要中关键词前后保留的字符数
+SNIPPET_RADIUS = 40
+
+# 重建索引时每批处理的帖子数
+REBUILD_BATCH_SIZE = 500
+
+# PostgreSQL 三元组索引（索引名 -> 表和列）
+TRIGRAM_INDEXES = {
+    "ix_posts_title_trgm": ("posts", "title"),
+    "ix_posts_content_trgm": ("posts", "content"),
+    "ix_comments_content_trgm": ("comments", "content"),
+}
+
+_CJK_RUN = re.compile(
+    r"[぀-ヿ㐀-䶿一-鿿豈-﫿가-힯]+"
+)
+
+posts_fts = table(
+    "posts_fts",
+    column("rowid", Integer),
+    column("title", Text),
+    column("content", Text),
+)
+
+_fts_enabled = False
+
+
+def is_fts_enabled() -> bool:
+    """FTS5 索引是否可用"""
+    return _fts_enabled
+
+
+def _split_cjk_run(run: str) -> list[str]:
+    """将连续的CJK字符切成二元组，末尾补一个单字"""
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)] + [run[-1]]
+
+
+def tokenize_for_index(text: str) -> str:
+    """生成写入FTS索引的文本"""
+    return _CJK_RUN.sub(lambda m: " " + " ".join(_split_cjk_run(m.group())) + " ", text)
+
+
+def build_match_query(keyword: str) -> Optional[str]:
+    """将用户关键词转换为FTS5 MATCH表达式（各词之间为AND关系）"""
+    terms = []
+    for word in keyword.split():
+        pos = 0
+        for m in _CJK_RUN.finditer(word):
+            terms.extend(_quote_terms(word[pos:m.start()]))
+            run = m.group()
+            if len(run) == 1:
+                terms.append(f'"{run}"*')
+            else:
+                bigrams = [run[i:i + 2] for i in range(len(run) - 1)]
+                terms.append('"' + " ".join(bigrams) + '"')
+            pos = m.end()
+        terms.extend(_quote_terms(word[pos:]))
+
+    return " ".join(terms) if terms else None
+
+
+def _quote_terms(text: str) -> list[str]:
+    """将非CJK文本中的单词转义为FTS5前缀查询（"hel" 可匹配 "hello"）"""
+    words = re.findall(r"\w+", text)
+    return ['"' + word.replace('"', '""') + '"*' for word in words]
+
+
+def _match(match_query: str):
+    return literal_column("posts_fts").op("MATCH")(match_query)
+
+
+def _rank():
+    return func.bm25(literal_column("posts_fts"), TITLE_WEIGHT, CONTENT_WEIGHT)
+
+
+def matched_post_ids(match_query: str):
+    """匹配帖子ID的子查询，可用于 Post.id.in_(...)"""
+    return select(posts_fts.c.rowid).where(_match(match_query))
+
+
+def ranked_matches_query(match_query: str):
+    """匹配帖子的 (id, rank) 查询，rank 为BM25分数，越小越相关"""
+    return select(
+        posts_fts.c.rowid.label("id"),
+        _rank().label("rank")
+    ).where(_match(match_query))
+
+
+def count_matches_query(match_query: str):
+    """统计匹配帖子数的查询"""
+    return select(func.count()).select_from(posts_fts).where(_match(match_query))
+
+
+async def index_post(db: AsyncSession, post: Post) -> None:
+    """写入或更新单个帖子的索引"""
+    if not _fts_enabled:
+        return
+    
+    await db.execute(delete(posts_fts).where(posts_fts.c.rowid == post.id))
+    await db.execute(
+        insert(posts_fts).values(
+            rowid=post.id,
+            title=tokenize_for_index(post.title),
+            content=tokenize_for_index(post.content)
+        )
+    )
+
+
+async def _rebuild_index(conn: AsyncConnection) -> int:
+    """根据posts表重建全部索引"""
+    await conn.execute(delete(posts_fts))
+    
+    total = 0
+    last_id = 0
+    while True:
+        result = await conn.execute(
+            select(Post.id, Post.title, Post.content)
+            .where(Post.id > last_id)
+            .order_by(Post.id)
+            .limit(REBUILD_BATCH_SIZE)
+        )
+        rows = result.all()
+        if not rows:
+            break
+        
+        await conn.execute(
+            insert(posts_fts),
+            [
+                {
+                    "rowid": row.id,
+                    "title": tokenize_for_index(row.title),
+                    "content": tokenize_for_index(row.content)
+                }
+                for row in rows
+            ]
+        )
+        total += len(rows)
+        last_id = rows[-1].id
+    
+    return total
+
+
+async def init_trigram_indexes() -> bool:
+    """PostgreSQL：启用 pg_trgm 并创建 GIN 三元组索引"""
+    try:
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            for name, (table_name, column_name) in TRIGRAM_INDEXES.items():
+                await conn.exec_driver_sql(
+                    f"CREATE INDEX IF NOT EXISTS {name} "
+                    f"ON {table_name} USING gin ({column_name} gin_trgm_ops)"
+                )
+    except DBAPIError:
+        logger.warning("pg_trgm 不可用（需要 CREATE EXTENSION 权限），模糊搜索将全表扫描")
+        return False
+    return True
+
+
+async def init_search_index() -> bool:
+    """创建FTS5索引表和删除触发器，必要时重建索引"""
+    global _fts_enabled
+    
+    if engine.dialect.name == "postgresql":
+        await init_trigram_indexes()
+        _fts_enabled = False
+        return False
+    
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+    
+    try:
+        async with engine.begin() as conn:
+            await conn.exec_driver_sql(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts "
+                "USING fts5(title, content, tokenize='unicode61')"
+            )
+            await conn.exec_driver_sql(
+                "CREATE TRIGGER IF NOT EXISTS posts_fts_after_delete "
+                "AFTER DELETE ON posts BEGIN "
+                "DELETE FROM posts_fts WHERE rowid = old.id; "
+                "END"
+            )
+            
+            indexed = (await conn.execute(select(func.count()).select_from(posts_fts))).scalar()
+            total = (await conn.execute(select(func.count(Post.id)))).scalar()
+            if indexed != total:
+                rebuilt = await _rebuild_index(conn)
+                logger.info("全文索引已重建，共 %d 个帖子", rebuilt)
+    except OperationalError:
+        logger.warning("FTS5 不可用，搜索将使用 LIKE 查询")
+        _fts_enabled = False
+        return False
+    
+    _fts_enabled = True
+    return True
+
+
+def highlight(text: str, keyword: str, radius: Optional[int] = None) -> str:
+    """
+    生成带 <mark> 高亮的文本（其余内容做HTML转义）
+    
+    指定 radius 时只截取第一个命中位置前后 radius 个字符作为摘要。
+    """
+    terms = [term for term in keyword.split() if term]
+    if not terms:
+        return html.escape(text)
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    
+    prefix = suffix = ""
+    if radius is not None:
+        first = pattern.search(text)
+        center = first.start() if first else 0
+        start = max(center - radius, 0)
+        end = min(center + radius * 2, len(text))
+        prefix = "…" if start > 0 else ""
+        suffix = "…" if end < len(text) else ""
+        text = text[start:end]
+    
+    parts = []
+    pos = 0
+    for m in pattern.finditer(text):
+        parts.append(html.escape(text[pos:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group())}</mark>")
+        pos = m.end()
+    parts.append(html.escape(text[pos:]))
+    
+    return prefix + "".join(parts) + suffix
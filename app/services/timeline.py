@@ -0,0 +1,241 @@
+"""
+关注时间线服务
+
+发帖时把帖子写入每个关注者的收件箱（timeline_entries），读取关注流只需按收件人
+游标分页。扇出在事务提交后由后台任务完成，不占用发帖请求的时间。
+
+粉丝数超过 TIMELINE_FANOUT_MAX_FOLLOWERS 的作者不扇出（写放大过高），
+读取时直接从 posts 表拉取其帖子，与收件箱合并排序。粉丝数读取 total_counts 中
+维护的计数，不按关注记录统计。
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+from sqlalchemy import String, select, insert, delete, func, desc, exists, literal, union, cast, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.pagination import decode_cursor, keyset_before, split_page
+from app.models.user import Follow
+from app.models.post import Post
+from app.models.timeline import TimelineEntry
+from app.models.total import TotalCount
+from app.services.totals import followers_key, get_total
+
+logger = logging.getLogger(__name__)
+
+# session.info 中保存待扇出帖子的键
+_PENDING_KEY = "timeline_fanout"
+
+_ENTRY_COLUMNS = ["user_id", "post_id", "author_id", "created_at"]
+
+
+def _not_in_inbox(user_id_column, post_id_column):
+    """收件箱中尚无该帖子的条件（避免与并发扇出重复写入）"""
+    return ~exists().where(
+        TimelineEntry.user_id == user_id_column,
+        TimelineEntry.post_id == post_id_column,
+    )
+
+
+def followers_count_query(user_id: int):
+    """按关注记录统计粉丝数的查询（计数行不存在时使用）"""
+    return select(func.count(Follow.id)).where(Follow.following_id == user_id)
+
+
+async def count_followers(db: AsyncSession, user_id: int) -> int:
+    """作者的粉丝数"""
+    return await get_total(db, followers_key(user_id), followers_count_query(user_id))
+
+
+async def is_pulled_author(db: AsyncSession, author_id: int) -> bool:
+    """作者是否走读时拉取（粉丝数超过扇出阈值）"""
+    return await count_followers(db, author_id) > settings.TIMELINE_FANOUT_MAX_FOLLOWERS
+
+
+async def fan_out_post(db: AsyncSession, post_id: int) -> int:
+    """把帖子写入作者所有关注者的收件箱，返回写入条数"""
+    result = await db.execute(
+        select(Post.id, Post.author_id, Post.created_at).where(Post.id == post_id)
+    )
+    post = result.one_or_none()
+    if post is None or await is_pulled_author(db, post.author_id):
+        return 0
+    
+    followers = select(
+        Follow.follower_id,
+        literal(post.id),
+        literal(post.author_id),
+        literal(post.created_at, type_=Post.created_at.type),
+    ).where(
+        Follow.following_id == post.author_id,
+        _not_in_inbox(Follow.follower_id, post.id),
+    )
+    result = await db.execute(insert(TimelineEntry).from_select(_ENTRY_COLUMNS, followers))
+    return result.rowcount
+
+
+async def backfill_timeline(db: AsyncSession, user_id: int, author_id: int) -> None:
+    """关注后把作者最近的帖子补入收件箱"""
+    if await is_pulled_author(db, author_id):
+        return
+    
+    recent = (
+        select(literal(user_id), Post.id, Post.author_id, Post.created_at)
+        .where(Post.author_id == author_id, _not_in_inbox(user_id, Post.id))
+        .order_by(desc(Post.created_at), desc(Post.id))
+        .limit(settings.TIMELINE_BACKFILL_POSTS)
+    )
+    await db.execute(insert(TimelineEntry).from_select(_ENTRY_COLUMNS, recent))
+
+
+async def remove_author_from_timeline(db: AsyncSession, user_id: int, author_id: int) -> None:
+    """取消关注后清理收件箱中该作者的帖子"""
+    await db.execute(
+        delete(TimelineEntry).where(
+            TimelineEntry.user_id == user_id,
+            TimelineEntry.author_id == author_id,
+        )
+    )
+
+
+async def remove_posts_from_timelines(db: AsyncSession, post_ids: Iterable[int]) -> None:
+    """删除帖子时清理所有收件箱中的条目"""
+    post_ids = list(post_ids)
+    if post_ids:
+        await db.execute(delete(TimelineEntry).where(TimelineEntry.post_id.in_(post_ids)))
+
+
+async def pulled_author_ids(db: AsyncSession, user_id: int) -> list[int]:
+    """用户关注的作者中需要读时拉取的作者"""
+    # 与 followers_key 的格式一致
+    key = literal("followers:") + cast(Follow.following_id, String)
+    result = await db.execute(
+        select(Follow.following_id, TotalCount.value)
+        .outerjoin(TotalCount, TotalCount.key == key)
+        .where(Follow.follower_id == user_id)
+    )
+    
+    pulled = []
+    for author_id, followers in result.all():
+        if followers is None:
+            # 计数行不存在（新作者或被清除后），统计一次并写入
+            followers = await count_followers(db, author_id)
+        if followers > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+            pulled.append(author_id)
+    return pulled
+
+
+async def fetch_timeline_page(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    options: Sequence = ()
+) -> tuple[list[Post], Optional[str]]:
+    """按游标读取一页关注流（收件箱 + 大V作者拉取），返回 (帖子列表, 下一页游标)；options 为帖子的附加加载选项"""
+    values = decode_cursor(cursor, datetime, int) if cursor else None
+    
+    inbox = (
+        select(TimelineEntry.created_at.label("created_at"), TimelineEntry.post_id.label("post_id"))
+        .join(Post, Post.id == TimelineEntry.post_id)
+        .where(TimelineEntry.user_id == user_id)
+        .order_by(desc(TimelineEntry.created_at), desc(TimelineEntry.post_id))
+        .limit(limit + 1)
+    )
+    if values:
+        inbox = inbox.where(keyset_before((TimelineEntry.created_at, TimelineEntry.post_id), values))
+    sources = [select(inbox.subquery())]
+    
+    pulled_ids = await pulled_author_ids(db, user_id)
+    if pulled_ids:
+        pulled = (
+            select(Post.created_at.label("created_at"), Post.id.label("post_id"))
+            .where(Post.author_id.in_(pulled_ids))
+            .order_by(desc(Post.created_at), desc(Post.id))
+            .limit(limit + 1)
+        )
+        if values:
+            pulled = pulled.where(keyset_before((Post.created_at, Post.id), values))
+        sources.append(select(pulled.subquery()))
+    
+    # union 去重：作者跨过阈值前已扇出的帖子可能同时出现在两路
+    merged = (union(*sources) if len(sources) > 1 else sources[0]).subquery()
+    result = await db.execute(
+        select(merged.c.created_at, merged.c.post_id)
+        .order_by(desc(merged.c.created_at), desc(merged.c.post_id))
+        .limit(limit + 1)
+    )
+    rows, next_cursor = split_page(result.all(), limit, lambda row: (row.created_at, row.post_id))
+    
+    post_ids = [row.post_id for row in rows]
+    if not post_ids:
+        return [], next_cursor
+    result = await db.execute(
+        select(Post).options(*options).where(Post.id.in_(post_ids))
+    )
+    posts_by_id = {post.id: post for post in result.scalars().all()}
+    return [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id], next_cursor
+
+
+class TimelineFanout:
+    """后台扇出队列"""
+    
+    def __init__(self):
+        self._queue: asyncio.Queue[int] = asyncio.Queue()
+    
+    def enqueue(self, post_id: int) -> None:
+        """提交待扇出的帖子"""
+        self._queue.put_nowait(post_id)
+    
+    def schedule(self, db: AsyncSession, post_id: int) -> None:
+        """登记在当前事务提交后扇出的帖子"""
+        db.info.setdefault(_PENDING_KEY, []).append(post_id)
+    
+    async def _process(self, post_id: int) -> None:
+        async with AsyncSessionLocal() as db:
+            count = await fan_out_post(db, post_id)
+            await db.commit()
+        logger.debug("帖子 %d 已扇出到 %d 个收件箱", post_id, count)
+    
+    async def drain(self) -> None:
+        """处理队列中剩余的帖子（应用关闭时调用）"""
+        while not self._queue.empty():
+            post_id = self._queue.get_nowait()
+            try:
+                await self._process(post_id)
+            except Exception:
+                logger.exception("帖子 %d 扇出失败", post_id)
+    
+    async def run_worker(self) -> None:
+        """后台任务：逐个处理扇出队列"""
+        while True:
+            post_id = await self._queue.get()
+            try:
+                await self._process(post_id)
+            except Exception:
+                logger.exception("帖子 %d 扇出失败", post_id)
+
+
+# 全局扇出队列实例
+timeline_fanout = TimelineFanout()
+
+
+@event.listens_for(Session, "after_commit")
+def _enqueue_after_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        # SAVEPOINT 释放，等最外层事务提交
+        return
+    for post_id in session.info.pop(_PENDING_KEY, ()):
+        timeline_fanout.enqueue(post_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    session.info.pop(_PENDING_KEY, None)
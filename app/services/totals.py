@@ -0,0 +1,159 @@
+"""
+总数计数服务
+
+全表总数和按作者/用户的总数保存在 total_counts 表中，由写操作在同一事务内增量更新。
+计数行不存在时（新键或被清除后）读取方执行一次 count(*) 并写入，之后不再扫描；
+只读会话（可能连接到副本）中缺失的计数行在主库上统计和写入。
+无法预先维护的带筛选条件的总数（搜索、后台筛选）使用进程内短时缓存的近似值。
+"""
+from collections import Counter
+from typing import Iterable
+
+from sqlalchemy import bindparam, literal, select, update, delete, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import MemoryCacheBackend
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine, is_read_only
+from app.models.user import Follow
+from app.models.post import Post, PostFavorite
+from app.models.total import TotalCount
+
+# 全表总数的键
+POSTS = "posts"
+COMMENTS = "comments"
+USERS = "users"
+
+# 按键读取计数行（预构建语句）
+_TOTAL_BY_KEY = select(TotalCount.value).where(TotalCount.key == bindparam("key"))
+
+# 各数据库方言支持 ON CONFLICT 的 INSERT 构造
+_DIALECT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# 带筛选条件总数的近似值缓存
+_approximate = MemoryCacheBackend(settings.TOTALS_CACHE_MAX_ENTRIES)
+
+
+def author_posts_key(user_id: int) -> str:
+    """作者帖子数的键"""
+    return f"posts:author:{user_id}"
+
+
+def user_favorites_key(user_id: int) -> str:
+    """用户收藏数的键"""
+    return f"favorites:user:{user_id}"
+
+
+def followers_key(user_id: int) -> str:
+    """粉丝数的键"""
+    return f"followers:{user_id}"
+
+
+def following_key(user_id: int) -> str:
+    """关注数的键"""
+    return f"following:{user_id}"
+
+
+async def get_total(db: AsyncSession, key: str, count_query) -> int:
+    """读取总数，计数行不存在时用 count_query 统计并写入"""
+    result = await db.execute(_TOTAL_BY_KEY, {"key": key})
+    value = result.scalar_one_or_none()
+    if value is not None:
+        return value
+    
+    if is_read_only(db):
+        async with AsyncSessionLocal() as primary:
+            value = await _seed_total(primary, key, count_query)
+            await primary.commit()
+        return value
+    return await _seed_total(db, key, count_query)
+
+
+async def _seed_total(db: AsyncSession, key: str, count_query) -> int:
+    """用一条 INSERT ... SELECT count 统计并写入计数行，再读回计数行的值
+    
+    统计和写入在同一条语句中完成，不会被并发写入隔开；并发请求已写入同一计数行时
+    ON CONFLICT DO NOTHING 保留已有的行。
+    """
+    insert = _DIALECT_INSERTS[engine.dialect.name]
+    await db.execute(
+        insert(TotalCount)
+        .from_select(["key", "value"], select(literal(key), count_query.scalar_subquery()))
+        .on_conflict_do_nothing(index_elements=[TotalCount.key])
+    )
+    result = await db.execute(_TOTAL_BY_KEY, {"key": key})
+    return result.scalar_one()
+
+
+async def adjust_total(db: AsyncSession, key: str, delta: int) -> None:
+    """增量更新总数（计数行不存在时跳过，由下次读取统计）"""
+    if delta:
+        await db.execute(
+            update(TotalCount)
+            .where(TotalCount.key == key)
+            .values(value=TotalCount.value + delta)
+        )
+
+
+async def forget_totals(db: AsyncSession, keys: Iterable[str]) -> None:
+    """清除计数行，下次读取时重新统计（用于无法精确增量维护的批量删除）"""
+    keys = list(keys)
+    if keys:
+        await db.execute(delete(TotalCount).where(TotalCount.key.in_(keys)))
+
+
+async def approximate_total(db: AsyncSession, key: str, count_query) -> int:
+    """带筛选条件的总数，在进程内缓存 TOTALS_CACHE_TTL_SECONDS 秒"""
+    cached = _approximate.get(key)
+    if cached is not None:
+        return int(cached)
+    
+    value = (await db.execute(count_query)).scalar() or 0
+    _approximate.set(key, str(value).encode(), settings.TOTALS_CACHE_TTL_SECONDS)
+    return value
+
+
+async def release_post_totals(db: AsyncSession, posts: list[Post]) -> None:
+    """删除帖子前扣减相关总数（帖子数、作者帖子数、评论数、收藏者的收藏数）"""
+    if not posts:
+        return
+    
+    await adjust_total(db, POSTS, -len(posts))
+    await adjust_total(db, COMMENTS, -sum(post.comment_count for post in posts))
+    for author_id, count in Counter(post.author_id for post in posts).items():
+        await adjust_total(db, author_posts_key(author_id), -count)
+    
+    result = await db.execute(
+        select(PostFavorite.user_id, func.count(PostFavorite.id))
+        .where(PostFavorite.post_id.in_([post.id for post in posts]))
+        .group_by(PostFavorite.user_id)
+    )
+    for user_id, count in result.all():
+        await adjust_total(db, user_favorites_key(user_id), -count)
+
+
+async def forget_user_totals(db: AsyncSession, user_id: int) -> None:
+    """删除用户前清除受影响的总数（其帖子、评论、关注关系和被收藏记录会一并删除）"""
+    followed = await db.execute(select(Follow.following_id).where(Follow.follower_id == user_id))
+    fans = await db.execute(select(Follow.follower_id).where(Follow.following_id == user_id))
+    favoriters = await db.execute(
+        select(PostFavorite.user_id)
+        .join(Post, Post.id == PostFavorite.post_id)
+        .where(Post.author_id == user_id)
+        .distinct()
+    )
+    
+    keys = [
+        POSTS,
+        COMMENTS,
+        USERS,
+        author_posts_key(user_id),
+        user_favorites_key(user_id),
+        followers_key(user_id),
+        following_key(user_id),
+    ]
+    keys += [followers_key(uid) for uid in followed.scalars().all()]
+    keys += [following_key(uid) for uid in fans.scalars().all()]
+    keys += [user_favorites_key(uid) for uid in favoriters.scalars().all()]
+    await forget_totals(db, keys)
@@ -0,0 +1,78 @@
+"""
+浏览量写缓冲服务
+
+帖子详情的浏览量先累加到进程内缓冲区，由后台任务按固定间隔批量写回数据库
+（浏览量和热度分各一次 executemany），避免每次 GET 都抢占 SQLite 的写锁。应用关闭时会把缓冲区
+中剩余的浏览量全部写回。
+"""
+import asyncio
+import logging
+
+from sqlalchemy import update, bindparam
+
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post
+from app.services.hot_rank import refresh_hot_scores
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCountBuffer:
+    """进程内浏览量缓冲区"""
+    
+    def __init__(self):
+        self._pending: dict[int, int] = {}
+        self._flush_lock = asyncio.Lock()
+    
+    def record(self, post_id: int, count: int = 1) -> None:
+        """记录浏览"""
+        self._pending[post_id] = self._pending.get(post_id, 0) + count
+    
+    def pending(self, post_id: int) -> int:
+        """尚未写回数据库的浏览量"""
+        return self._pending.get(post_id, 0)
+    
+    async def flush(self) -> int:
+        """将缓冲区写回数据库，返回写回的帖子数"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            
+            batch, self._pending = self._pending, {}
+            stmt = (
+                update(Post.__table__)
+                .where(Post.__table__.c.id == bindparam("post_id"))
+                .values(
+                    view_count=Post.__table__.c.view_count + bindparam("delta"),
+                    updated_at=Post.__table__.c.updated_at
+                )
+            )
+            
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(
+                        stmt,
+                        [{"post_id": post_id, "delta": delta} for post_id, delta in batch.items()]
+                    )
+                    await refresh_hot_scores(db, batch)
+                    await db.commit()
+            except Exception:
+                # 写回失败时放回缓冲区，等待下次重试
+                for post_id, delta in batch.items():
+                    self.record(post_id, delta)
+                raise
+            
+            return len(batch)
+    
+    async def run_flusher(self, interval: float) -> None:
+        """后台任务：定期写回缓冲区"""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("浏览量写回失败")
+
+
+# 全局缓冲区实例
+view_buffer = ViewCountBuffer()
@@ -0,0 +1,82 @@
+"""
+当前用户互动状态服务 - 批量查询点赞/收藏/关注状态
+
+列表接口先收集本页的帖子、评论、用户ID，再通过 load_viewer_state 为每种关系
+各执行一次 IN (...) 查询，避免逐条判断或加载全部互动记录。
+"""
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import Follow
+from app.models.post import PostLike, PostFavorite
+from app.models.comment import CommentLike
+from app.services.principals import Principal
+
+
+@dataclass(frozen=True)
+class ViewerState:
+    """当前用户对本页内容的互动状态"""
+    liked_post_ids: frozenset[int] = field(default_factory=frozenset)
+    favorited_post_ids: frozenset[int] = field(default_factory=frozenset)
+    liked_comment_ids: frozenset[int] = field(default_factory=frozenset)
+    following_user_ids: frozenset[int] = field(default_factory=frozenset)
+    
+    def is_post_liked(self, post_id: int) -> bool:
+        return post_id in self.liked_post_ids
+    
+    def is_post_favorited(self, post_id: int) -> bool:
+        return post_id in self.favorited_post_ids
+    
+    def is_comment_liked(self, comment_id: int) -> bool:
+        return comment_id in self.liked_comment_ids
+    
+    def is_following(self, user_id: int) -> bool:
+        return user_id in self.following_user_ids
+
+
+# 未登录或无需查询时使用的空状态
+EMPTY_VIEWER_STATE = ViewerState()
+
+
+async def _load_ids(db: AsyncSession, id_column, owner_column, owner_id: int, ids: set[int]) -> frozenset[int]:
+    """查询 owner 在给定ID集合中存在关系的ID"""
+    if not ids:
+        return frozenset()
+    result = await db.execute(
+        select(id_column).where(owner_column == owner_id, id_column.in_(ids))
+    )
+    return frozenset(result.scalars().all())
+
+
+async def load_viewer_state(
+    db: AsyncSession,
+    current_user: Optional[Principal],
+    post_ids: Iterable[int] = (),
+    comment_ids: Iterable[int] = (),
+    user_ids: Iterable[int] = ()
+) -> ViewerState:
+    """批量加载当前用户对给定帖子/评论/用户的互动状态（每种关系一次查询）"""
+    if not current_user:
+        return EMPTY_VIEWER_STATE
+    
+    post_ids = set(post_ids)
+    comment_ids = set(comment_ids)
+    user_ids = set(user_ids)
+    
+    return ViewerState(
+        liked_post_ids=await _load_ids(
+            db, PostLike.post_id, PostLike.user_id, current_user.id, post_ids
+        ),
+        favorited_post_ids=await _load_ids(
+            db, PostFavorite.post_id, PostFavorite.user_id, current_user.id, post_ids
+        ),
+        liked_comment_ids=await _load_ids(
+            db, CommentLike.comment_id, CommentLike.user_id, current_user.id, comment_ids
+        ),
+        following_user_ids=await _load_ids(
+            db, Follow.following_id, Follow.follower_id, current_user.id, user_ids
+        ),
+    )
@@ -21,6 +21,7 @@ from app.models.user import User
 # 导入所有模型以确保关系正确初始化
 from app.models.post import Post, PostLike, PostFavorite
 from app.models.comment import Comment, CommentLike
+from app.services.totals import USERS, adjust_total
 
 
 async def add_admin(username: str, password: str, email: str):
@@ -54,6 +55,7 @@ async def add_admin(username: str, password: str, email: str):
         )
         
         db.add(admin_user)
+        await adjust_total(db, USERS, 1)
         await db.commit()
         await db.refresh(admin_user)
         
@@ -0,0 +1,113 @@
+"""
+JSON 序列化基准测试 - 对比一页帖子列表在不同序列化路径下的耗时
+用法:
+    uv run python -m scripts.bench_json
+    
+    # 自定义每页帖子数和重复次数
+    uv run python -m scripts.bench_json --posts 100 --rounds 500
+"""
+import argparse
+import json
+import timeit
+from datetime import timedelta
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import dump_json
+from app.core.timezone import now_beijing
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment  # noqa: F401  注册 Post.comments 关系
+from app.api.routes.posts import format_post
+from app.schemas.common import success_response
+from app.schemas.post import PostListResponse
+from app.services.viewer_state import ViewerState
+
+
+def build_page(size: int) -> dict:
+    """构造一页帖子列表响应（不访问数据库）"""
+    now = now_beijing()
+    author = User(
+        id=1,
+        username="animelover",
+        email="animelover@example.com",
+        avatar="https://api.dicebear.com/7.x/avataaars/svg?seed=animelover",
+        created_at=now - timedelta(days=100),
+    )
+    posts = [
+        Post(
+            id=i,
+            title=f"《葬送的芙莉莲》第{i}集讨论",
+            content="这一集的作画和配乐都非常出色,芙莉莲回忆起和勇者一行人旅行的片段让人感动。" * 4,
+            images=[f"https://example.com/images/{i}_{n}.jpg" for n in range(3)],
+            author_id=author.id,
+            author=author,
+            like_count=i * 3,
+            comment_count=i,
+            favorite_count=i // 2,
+            view_count=i * 40,
+            created_at=now - timedelta(minutes=i),
+            updated_at=now - timedelta(minutes=i),
+        )
+        for i in range(1, size + 1)
+    ]
+    viewer = ViewerState(liked_post_ids=frozenset(range(1, size + 1, 3)))
+    items = [format_post(post, viewer) for post in posts]
+    return success_response(
+        data={"items": items, "total": 10000, "page": 1, "limit": size, "hasMore": True, "nextCursor": None}
+    )
+
+
+def encode_default(payload: dict) -> bytes:
+    """原路径：jsonable_encoder + 标准库 json（与 FastAPI 默认 JSONResponse 一致）"""
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def encode_pydantic(payload: dict, adapter: TypeAdapter) -> bytes:
+    """按 Pydantic 响应模型校验后序列化"""
+    items = adapter.validate_python(payload["data"]["items"])
+    return adapter.dump_json(items)
+
+
+def encode_fast(payload: dict) -> bytes:
+    """新路径：orjson 直接序列化"""
+    return dump_json(payload)
+
+
+def run(size: int, rounds: int):
+    """执行基准测试"""
+    payload = build_page(size)
+    adapter = TypeAdapter(list[PostListResponse])
+    
+    cases = [
+        ("jsonable_encoder + json", lambda: encode_default(payload)),
+        ("pydantic TypeAdapter", lambda: encode_pydantic(payload, adapter)),
+        ("orjson (FastJSONResponse)", lambda: encode_fast(payload)),
+    ]
+    
+    print(f"📊 {size} 条帖子/页, 每项 {rounds} 次, 响应体 {len(encode_fast(payload)) / 1024:.1f} KB")
+    baseline = None
+    for name, func in cases:
+        seconds = min(timeit.repeat(func, number=rounds, repeat=3)) / rounds
+        baseline = baseline or seconds
+        print(f"   {name:<28} {seconds * 1e6:>9.1f} µs/次   x{baseline / seconds:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON 序列化基准测试")
+    parser.add_argument("--posts", type=int, default=100, help="每页帖子数")
+    parser.add_argument("--rounds", type=int, default=200, help="每轮重复次数")
+    args = parser.parse_args()
+    
+    run(args.posts, args.rounds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+只读会话基准测试 - 对比 GET 请求使用提交事务的会话和只读会话时每个请求的数据库耗时
+用法:
+    uv run python -m scripts.bench_read_session
+    
+    # 自定义帖子数、请求次数和并发数
+    uv run python -m scripts.bench_read_session --posts 2000 --requests 2000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+from sqlalchemy import select, desc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import defer
+
+from app.core.config import settings
+from app.core.database import Base, READ_ONLY_KEY, create_engine_for
+from app.core.timezone import now_beijing
+from app.models.user import User
+from app.models.post import Post
+from app.models.comment import Comment  # noqa: F401  注册 Post.comments 关系
+
+
+async def seed(session_factory: async_sessionmaker, posts: int) -> None:
+    """写入测试用户和帖子"""
+    now = now_beijing()
+    async with session_factory() as db:
+        author = User(username="bench", email="bench@example.com", hashed_password="x")
+        db.add(author)
+        await db.flush()
+        db.add_all(
+            Post(
+                title=f"基准测试帖子 {i}",
+                content="葬送的芙莉莲第二季定档了，大家怎么看？" * 8,
+                author_id=author.id,
+                created_at=now - timedelta(minutes=i),
+            )
+            for i in range(posts)
+        )
+        await db.commit()
+
+
+async def handle_request(session_factory: async_sessionmaker, commit: bool) -> None:
+    """模拟一次帖子列表 GET 请求的数据库访问：查当前用户、查一页帖子"""
+    async with session_factory() as db:
+        await db.execute(select(User).where(User.id == 1))
+        result = await db.execute(
+            select(Post)
+            .options(defer(Post.content))
+            .order_by(desc(Post.created_at), desc(Post.id))
+            .limit(20)
+        )
+        result.scalars().all()
+        if commit:
+            await db.commit()
+
+
+async def run(session_factory: async_sessionmaker, commit: bool, requests: int, concurrency: int) -> float:
+    """并发执行模拟请求，返回每个请求的平均耗时（毫秒）"""
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def one() -> None:
+        async with semaphore:
+            await handle_request(session_factory, commit)
+    
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return (time.perf_counter() - start) / requests * 1000
+
+
+async def main(posts: int, requests: int, concurrency: int) -> None:
+    url = make_url(f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+    writer = create_engine_for(url, settings.DB_WRITER_POOL_SIZE)
+    reader = create_engine_for(url, settings.DB_READER_POOL_SIZE, read_only=True)
+    
+    async with writer.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    
+    commit_sessions = async_sessionmaker(writer, class_=AsyncSession, expire_on_commit=False)
+    read_sessions = async_sessionmaker(
+        reader, class_=AsyncSession, autoflush=False, expire_on_commit=False, info={READ_ONLY_KEY: True}
+    )
+    await seed(commit_sessions, posts)
+    
+    # 预热连接池
+    await run(commit_sessions, True, concurrency, concurrency)
+    await run(read_sessions, False, concurrency, concurrency)
+    
+    print(f"帖子数: {posts}  请求数: {requests}  并发: {concurrency}")
+    committed = await run(commit_sessions, True, requests, concurrency)
+    print(f"  提交事务的会话（原 get_db）   {committed:8.3f} ms/请求")
+    read_only = await run(read_sessions, False, requests, concurrency)
+    print(f"  只读会话（get_read_db）       {read_only:8.3f} ms/请求")
+    print(f"  每个请求节省 {committed - read_only:.3f} ms（{(1 - read_only / committed) * 100:.1f}%）")
+    
+    await reader.dispose()
+    await writer.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="只读会话基准测试")
+    parser.add_argument("--posts", type=int, default=1000, help="测试库中的帖子数")
+    parser.add_argument("--requests", type=int, default=1000, help="模拟请求次数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发请求数")
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.posts, args.requests, args.concurrency))
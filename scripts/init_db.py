@@ -12,6 +12,8 @@ from app.core.security import get_password_hash
 from app.models.user import User
 from app.models.post import Post, PostLike
 from app.models.comment import Comment
+from app.services.counters import post_recount_stmt, comment_recount_stmt
+from app.services.hot_rank import redecay_hot_scores
 
 
 # 测试用户数据
@@ -157,9 +159,15 @@ async def create_test_data():
                 db.add(comment)
                 comments_count += 1
         
-        await db.commit()
+        await db.flush()
         print(f"✅ 创建了 {comments_count} 条评论")
         
+        # 根据点赞和评论记录回填冗余计数和热度分
+        await db.execute(post_recount_stmt())
+        await db.execute(comment_recount_stmt())
+        await redecay_hot_scores(db)
+        await db.commit()
+        
         print("\n📋 测试账号信息:")
         print("=" * 40)
         print("管理员账号: admin / admin123")
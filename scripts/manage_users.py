@@ -13,6 +13,10 @@
     # 取消用户管理员权限
     uv run python -m scripts.manage_users --remove-admin 1
     
+    # 禁用/启用用户（禁用后无法登录，已签发的 token 也会失效）
+    uv run python -m scripts.manage_users --disable 1
+    uv run python -m scripts.manage_users --enable 1
+    
     # 删除用户
     uv run python -m scripts.manage_users --delete 1
     
@@ -21,6 +25,9 @@
     
     # 重置用户密码
     uv run python -m scripts.manage_users --reset-password 1 --new-password newpass123
+
+管理员身份不缓存，撤销管理员权限在运行中的服务上立即生效；授予管理员、禁用和删除操作
+最迟 PRINCIPAL_CACHE_TTL_SECONDS 秒后生效（登录身份缓存过期）
 """
 import argparse
 
@@ -28,14 +35,22 @@ from sqlalchemy import create_engine, select, delete, func
 from sqlalchemy.orm import sessionmaker, selectinload
 
 from app.core.config import settings
+from app.core.database import sync_database_url
 from app.core.security import get_password_hash
 from app.models.user import User, Follow
 from app.models.post import Post, PostLike, PostFavorite
 from app.models.comment import Comment, CommentLike
+from app.models.timeline import TimelineEntry
+from app.models.total import TotalCount
+from app.services.counters import (
+    post_recount_stmt,
+    comment_recount_stmt,
+    user_touched_posts_query,
+    user_touched_comments_query,
+)
 
 # 创建同步数据库引擎
-sync_url = settings.DATABASE_URL.replace("+aiosqlite", "")
-engine = create_engine(sync_url, echo=False)
+engine = create_engine(sync_database_url(settings.DATABASE_URL), echo=False)
 SessionLocal = sessionmaker(bind=engine)
 
 
@@ -44,7 +59,7 @@ def list_users():
     with SessionLocal() as db:
         result = db.execute(select(User).order_by(User.id))
         users = result.scalars().all()
-        
+    
     if not users:
         print("ℹ️  当前没有用户")
         return
@@ -99,7 +114,7 @@ def get_user_info(user_id: int):
             select(func.count(PostFavorite.id)).where(PostFavorite.user_id == user_id)
         )
         favorites_count = favorites_result.scalar() or 0
-        
+    
     print(f"\n{'='*60}")
     print(f"📌 用户详细信息 (ID: {user.id})")
     print(f"{'='*60}")
@@ -124,6 +139,11 @@ def get_user_info(user_id: int):
     return user
 
 
+def print_cache_notice():
+    """提示运行中的服务需等待身份缓存过期（管理员身份不缓存，撤销管理员权限立即生效）"""
+    print(f"ℹ️  运行中的服务将在 {settings.PRINCIPAL_CACHE_TTL_SECONDS:g} 秒内生效（登录身份缓存过期后）")
+
+
 def set_admin_by_id(user_id: int, is_admin: bool):
     """通过ID设置/取消用户的管理员权限"""
     with SessionLocal() as db:
@@ -144,6 +164,33 @@ def set_admin_by_id(user_id: int, is_admin: bool):
         
         action = "设为" if is_admin else "取消"
         print(f"✅ 已将用户 '{user.username}' (ID={user_id}) {action}管理员")
+        if is_admin:
+            print_cache_notice()
+        return True
+
+
+def set_active_by_id(user_id: int, is_active: bool):
+    """通过ID禁用/启用用户"""
+    with SessionLocal() as db:
+        result = db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        
+        if not user:
+            print(f"❌ 用户 ID={user_id} 不存在!")
+            return False
+        
+        if user.is_active == is_active:
+            status = "已经是启用" if is_active else "已经是禁用"
+            print(f"ℹ️  用户 '{user.username}' (ID={user_id}) {status}状态")
+            return True
+        
+        user.is_active = is_active
+        db.commit()
+        
+        action = "启用" if is_active else "禁用"
+        print(f"✅ 已{action}用户 '{user.username}' (ID={user_id})")
+        if not user.is_admin:
+            print_cache_notice()
         return True
 
 
@@ -199,6 +246,10 @@ def delete_user(user_id: int, force: bool = False):
         # 开始删除流程
         print(f"🗑️  正在删除用户 '{user.username}' (ID={user_id})...")
         
+        # 0. 记录受影响的帖子和评论，删除后重新统计计数
+        touched_post_ids = set(db.execute(user_touched_posts_query(user_id)).scalars().all())
+        touched_comment_ids = set(db.execute(user_touched_comments_query(user_id)).scalars().all())
+        
         # 1. 删除用户的评论点赞
         db.execute(delete(CommentLike).where(CommentLike.user_id == user_id))
         print("   ✓ 删除评论点赞记录")
@@ -238,7 +289,9 @@ def delete_user(user_id: int, force: bool = False):
             db.execute(delete(PostLike).where(PostLike.post_id.in_(user_post_ids)))
             db.execute(delete(PostFavorite).where(PostFavorite.post_id.in_(user_post_ids)))
         
-        # 7. 删除用户的帖子
+        # 7. 删除用户的帖子（含各收件箱中的时间线条目）
+        db.execute(delete(TimelineEntry).where(TimelineEntry.author_id == user_id))
+        db.execute(delete(TimelineEntry).where(TimelineEntry.user_id == user_id))
         db.execute(delete(Post).where(Post.author_id == user_id))
         print("   ✓ 删除帖子")
         
@@ -249,9 +302,23 @@ def delete_user(user_id: int, force: bool = False):
         
         # 9. 删除用户
         db.delete(user)
+        db.flush()
+        
+        # 10. 重新统计受影响的计数
+        if touched_post_ids:
+            db.execute(post_recount_stmt(touched_post_ids))
+        if touched_comment_ids:
+            db.execute(comment_recount_stmt(touched_comment_ids))
+        print("   ✓ 重新统计互动计数")
+        
+        # 11. 清除总数计数，服务下次读取时重新统计
+        db.execute(delete(TotalCount))
+        
         db.commit()
         
         print(f"\n✅ 用户 '{user.username}' (ID={user_id}) 已删除!")
+        if not user.is_admin:
+            print_cache_notice()
         return True
 
 
@@ -265,6 +332,8 @@ def main():
   %(prog)s --info 1                  查看用户ID=1的详细信息
   %(prog)s --set-admin 1             将用户ID=1设为管理员
   %(prog)s --remove-admin 1          取消用户ID=1的管理员权限
+  %(prog)s --disable 1               禁用用户ID=1
+  %(prog)s --enable 1                启用用户ID=1
   %(prog)s --delete 1                删除用户ID=1
   %(prog)s --delete 1 --force        强制删除用户ID=1（包括所有内容）
   %(prog)s --reset-password 1 --new-password abc123  重置用户ID=1的密码
@@ -275,6 +344,8 @@ def main():
     parser.add_argument("--info", "-i", type=int, metavar="ID", help="查看用户详细信息")
     parser.add_argument("--set-admin", "-s", type=int, metavar="ID", help="将用户设为管理员")
     parser.add_argument("--remove-admin", "-r", type=int, metavar="ID", help="取消用户管理员权限")
+    parser.add_argument("--disable", type=int, metavar="ID", help="禁用用户")
+    parser.add_argument("--enable", type=int, metavar="ID", help="启用用户")
     parser.add_argument("--delete", "-d", type=int, metavar="ID", help="删除用户")
     parser.add_argument("--force", "-f", action="store_true", help="强制删除（跳过确认）")
     parser.add_argument("--reset-password", "-p", type=int, metavar="ID", help="重置用户密码")
@@ -283,7 +354,10 @@ def main():
     args = parser.parse_args()
     
     # 如果没有提供任何参数，显示帮助
-    if not any([args.list, args.info, args.set_admin, args.remove_admin, args.delete, args.reset_password]):
+    if not any([
+        args.list, args.info, args.set_admin, args.remove_admin,
+        args.disable, args.enable, args.delete, args.reset_password
+    ]):
         parser.print_help()
         return
     
@@ -299,6 +373,12 @@ def main():
     if args.remove_admin:
         set_admin_by_id(args.remove_admin, False)
     
+    if args.disable:
+        set_active_by_id(args.disable, False)
+    
+    if args.enable:
+        set_active_by_id(args.enable, True)
+    
     if args.delete:
         delete_user(args.delete, args.force)
     
@@ -0,0 +1,85 @@
+"""
+互动计数校准脚本 - 根据点赞/评论/收藏记录回填并校准冗余计数字段，重新计算热度分并重置分页总数
+用法:
+    # 检查并修正所有帖子和评论的计数
+    uv run python -m scripts.reconcile_counters
+    
+    # 只检查不修改
+    uv run python -m scripts.reconcile_counters --dry-run
+"""
+import asyncio
+import argparse
+
+from sqlalchemy import select, delete, func, or_
+
+from app.core.database import AsyncSessionLocal, init_db
+from app.models.post import Post, PostLike, PostFavorite
+from app.models.comment import Comment, CommentLike
+from app.models.total import TotalCount
+from app.services.counters import post_recount_stmt, comment_recount_stmt
+from app.services.hot_rank import redecay_hot_scores
+
+
+async def count_drift(db) -> tuple[int, int]:
+    """统计计数与实际记录不一致的帖子数和评论数"""
+    actual_likes = select(func.count(PostLike.id)).where(PostLike.post_id == Post.id).scalar_subquery()
+    actual_comments = select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    actual_favorites = select(func.count(PostFavorite.id)).where(PostFavorite.post_id == Post.id).scalar_subquery()
+    post_result = await db.execute(
+        select(func.count(Post.id)).where(
+            or_(
+                Post.like_count != actual_likes,
+                Post.comment_count != actual_comments,
+                Post.favorite_count != actual_favorites,
+            )
+        )
+    )
+    
+    actual_comment_likes = (
+        select(func.count(CommentLike.id))
+        .where(CommentLike.comment_id == Comment.id)
+        .scalar_subquery()
+    )
+    comment_result = await db.execute(
+        select(func.count(Comment.id)).where(Comment.like_count != actual_comment_likes)
+    )
+    
+    return post_result.scalar() or 0, comment_result.scalar() or 0
+
+
+async def reconcile(dry_run: bool = False):
+    """校准全部计数"""
+    await init_db()
+    
+    async with AsyncSessionLocal() as db:
+        post_drift, comment_drift = await count_drift(db)
+        print(f"📊 计数不一致: 帖子 {post_drift} 条, 评论 {comment_drift} 条")
+        
+        if dry_run:
+            print("ℹ️  --dry-run 模式，未做修改")
+            return
+        
+        if post_drift:
+            await db.execute(post_recount_stmt())
+            # 热度分基于帖子计数，校准后按新计数重新计算
+            rescored = await redecay_hot_scores(db)
+            print(f"🔥 重新计算了 {rescored} 个帖子的热度分")
+        if comment_drift:
+            await db.execute(comment_recount_stmt())
+        # 分页总数由服务在下次读取时重新统计
+        await db.execute(delete(TotalCount))
+        await db.commit()
+        
+        print("✅ 计数校准完成!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="互动计数校准工具")
+    parser.add_argument("--dry-run", action="store_true", help="只检查不修改")
+    args = parser.parse_args()
+    
+    asyncio.run(reconcile(args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -171,8 +171,10 @@ if test $status -ne 0
     exit 1
 end
 
-# 检查数据库是否存在，如果不存在则初始化
-if not test -f "$PROJECT_DIR/anime_hub.db"
+# 检查数据库是否存在，如果不存在则初始化（使用 PostgreSQL 时由 init_db 建表）
+if string match -q "postgresql*" -- "$DATABASE_URL"
+    log_info "使用 PostgreSQL，表结构在服务启动时创建；如需测试数据请运行: uv run python -m scripts.init_db"
+else if not test -f "$PROJECT_DIR/anime_hub.db"
     log_warn "数据库不存在，正在初始化..."
     uv run python -m scripts.init_db
     if test $status -ne 0
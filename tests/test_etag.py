@@ -0,0 +1,24 @@
+"""
+帖子详情 ETag 测试
+"""
+from tests.conftest import ok, register
+
+
+def test_detail_etag_changes_when_commenter_updates_profile(run_api):
+    """评论者修改用户名后，详情的 ETag 失效，返回新的用户名"""
+    async def scenario(client):
+        author = await register(client, "etag_author")
+        commenter = await register(client, "etag_commenter")
+        post_id = ok(await client.post("/posts", json={"title": "ETag", "content": "正文"}, headers=author))["id"]
+        ok(await client.post(f"/posts/{post_id}/comments", json={"content": "沙发"}, headers=commenter))
+        
+        response = await client.get(f"/posts/{post_id}")
+        etag = response.headers["ETag"]
+        assert (await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})).status_code == 304
+        
+        ok(await client.put("/users/profile", json={"username": "etag_renamed"}, headers=commenter))
+        response = await client.get(f"/posts/{post_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert ok(response)["comments"][0]["author"]["username"] == "etag_renamed"
+    
+    run_api(scenario)
@@ -0,0 +1,52 @@
+"""
+登录限流测试
+"""
+import asyncio
+
+from app.core.config import settings
+from app.core.login_throttle import login_throttle
+from app.core.security import password_hasher
+from tests.conftest import ok, register
+
+
+def test_concurrent_bad_logins_do_not_flood_hash_pool(run_api):
+    """并发的错误密码请求在失败记录之前也只能占用有限的密码校验名额"""
+    async def scenario(client):
+        await register(client, "lt_victim")
+        await register(client, "lt_bystander")
+        completed = password_hasher.completed
+        
+        responses = await asyncio.gather(*(
+            client.post("/auth/login", json={"username": "lt_victim", "password": "wrong-password"})
+            for _ in range(30)
+        ))
+        codes = [response.status_code for response in responses]
+        
+        assert set(codes) == {400, 429}
+        assert codes.count(400) <= settings.LOGIN_MAX_IN_FLIGHT_PER_USERNAME
+        assert password_hasher.completed - completed <= settings.LOGIN_MAX_IN_FLIGHT_PER_USERNAME
+        assert password_hasher.rejected == 0
+        
+        # 名额释放后同一 IP 的其他用户不受影响
+        ok(await client.post("/auth/login", json={"username": "lt_bystander", "password": "secret123"}))
+    
+    run_api(scenario)
+
+
+def test_sequential_failures_lock_username(run_api):
+    """窗口内失败次数达到阈值后锁定用户名，正确密码同样被拒绝"""
+    async def scenario(client):
+        await register(client, "lt_locked")
+        
+        for _ in range(settings.LOGIN_MAX_FAILURES_PER_USERNAME):
+            response = await client.post("/auth/login", json={"username": "lt_locked", "password": "wrong-password"})
+            assert response.status_code == 400
+        
+        response = await client.post("/auth/login", json={"username": "lt_locked", "password": "secret123"})
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) == settings.LOGIN_LOCKOUT_BASE_SECONDS
+        
+        login_throttle.store.delete("username:lt_locked")
+        login_throttle.store.delete("ip:127.0.0.1")
+    
+    run_api(scenario)
@@ -0,0 +1,34 @@
+"""
+登录身份缓存测试
+"""
+from sqlalchemy import update
+
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.principals import principal_cache
+from tests.conftest import ok, register
+
+
+async def set_admin(user_id: int, is_admin: bool) -> None:
+    """模拟管理脚本在其他进程中直接修改数据库（不经过缓存失效）"""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id).values(is_admin=is_admin))
+        await db.commit()
+
+
+def test_admin_demotion_takes_effect_immediately(run_api):
+    """撤销管理员权限后下一个请求即失去后台权限"""
+    async def scenario(client):
+        headers = await register(client, "pc_admin")
+        user_id = ok(await client.get("/auth/user", headers=headers))["id"]
+        
+        await set_admin(user_id, True)
+        # 授予权限需等待缓存过期
+        principal_cache.invalidate(user_id)
+        ok(await client.get("/admin/stats", headers=headers))
+        ok(await client.get("/admin/stats", headers=headers))
+        
+        await set_admin(user_id, False)
+        assert (await client.get("/admin/stats", headers=headers)).status_code == 403
+    
+    run_api(scenario)
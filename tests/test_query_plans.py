@@ -0,0 +1,163 @@
+"""
+查询计划测试 - 调用各接口，对执行过的每条查询运行 EXPLAIN QUERY PLAN，
+出现全表扫描时失败（防止索引失效或查询改写后退化为扫表）
+
+仅在 SQLite 上运行:
+    uv run pytest tests/test_query_plans.py
+"""
+import re
+import sqlite3
+
+import httpx
+import pytest
+from sqlalchemy import event, update
+
+from app.core.database import AsyncSessionLocal, Base, engine, replica_engines
+from app.models.user import User
+from app.services.principals import principal_cache
+from tests.conftest import ok, register
+
+# 允许整表扫描的表（数据量固定且很小，或接口本身需要全量返回）
+ALLOWED_SCANS = {
+    "developers": "开发者列表全量返回",
+}
+
+# 允许整表扫描的语句（仅后台低频接口使用，为其增加索引会拖慢点赞、评论等高频写入）
+ALLOWED_STATEMENTS = {
+    re.compile(r"FROM posts ORDER BY posts\.(like_count|comment_count) DESC"): "后台帖子按点赞数 / 评论数排序",
+    re.compile(r"FROM comments WHERE lower\(comments\.content\) LIKE lower\(\?\)"): "后台评论模糊搜索无法使用索引",
+}
+
+# 不检查的语句（事务控制、PRAGMA、不带查询的插入等）
+_SKIPPED = re.compile(r"^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE|PRAGMA|INSERT INTO \w+ \([^)]*\) VALUES)", re.I)
+
+# 未使用索引的整表扫描，如 "SCAN posts"、"SCAN users AS users_1"
+_FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+class QueryRecorder:
+    """记录接口执行过的 SQL 语句及其参数（同一语句只保留第一次的参数）"""
+    
+    def __init__(self):
+        self.statements: dict[str, tuple] = {}
+    
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or _SKIPPED.match(statement):
+            return
+        self.statements.setdefault(statement, tuple(parameters or ()))
+    
+    def attach(self) -> None:
+        for bound in {engine, *replica_engines}:
+            event.listen(bound.sync_engine, "before_cursor_execute", self)
+    
+    def detach(self) -> None:
+        for bound in {engine, *replica_engines}:
+            event.remove(bound.sync_engine, "before_cursor_execute", self)
+
+
+async def exercise_routes(client: httpx.AsyncClient) -> None:
+    """依次调用各业务接口，覆盖列表、详情、互动和个人主页的查询"""
+    alice, bob, carol = [await register(client, name) for name in ("plan_alice", "plan_bob", "plan_carol")]
+    me = ok(await client.get("/auth/user", headers=alice))
+    bob_id = ok(await client.get("/auth/user", headers=bob))["id"]
+    
+    # alice 作为管理员访问后台接口
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(User).where(User.id == me["id"]).values(is_admin=True))
+        await db.commit()
+    principal_cache.invalidate(me["id"])
+    
+    post_ids = []
+    for i in range(6):
+        post = ok(await client.post(
+            "/posts",
+            json={"title": f"查询计划测试 {i} 芙莉莲", "content": f"第{i}篇正文 葬送的芙莉莲" * 5},
+            headers=(alice, bob)[i % 2],
+        ))
+        post_ids.append(post["id"])
+    post_id = post_ids[0]
+    
+    ok(await client.post(f"/users/{bob_id}/follow", headers=alice))
+    ok(await client.post(f"/users/{me['id']}/follow", headers=carol))
+    ok(await client.post(f"/posts/{post_id}/like", headers=bob))
+    ok(await client.post(f"/posts/{post_id}/favorite", headers=carol))
+    comment = ok(await client.post(f"/posts/{post_id}/comments", json={"content": "好看"}, headers=carol))
+    ok(await client.post(f"/comments/{comment['id']}/like", headers=bob))
+    ok(await client.put(f"/posts/{post_ids[2]}", json={"title": "修改后的标题"}, headers=alice))
+    
+    for path, auth in [
+        ("/posts", alice),
+        ("/posts?cursor=", None),
+        ("/posts/hot", None),
+        ("/posts/recommended", alice),
+        ("/posts/following", alice),
+        ("/posts/search?keyword=芙莉莲", None),
+        (f"/posts/{post_id}", bob),
+        (f"/posts/{post_id}/comments", bob),
+        (f"/posts/{post_id}/comments?sort=newest", None),
+        (f"/posts/{post_id}/comments?sort=mostLiked", None),
+        (f"/posts/{post_id}/comments?sort=oldest&limit=1", None),
+        (f"/users/{me['id']}/profile", bob),
+        (f"/users/{me['id']}/posts", None),
+        ("/users/favorites", carol),
+        (f"/users/{bob_id}/followers", alice),
+        (f"/users/{me['id']}/following", None),
+        ("/users/settings", alice),
+        ("/site/stats", None),
+        ("/site/fortune", alice),
+        ("/admin/posts", alice),
+        ("/admin/posts?sortBy=oldest", alice),
+        ("/admin/posts?sortBy=mostLiked", alice),
+        ("/admin/posts?sortBy=mostCommented", alice),
+        ("/admin/posts?search=芙莉莲", alice),
+        ("/admin/comments", alice),
+        ("/admin/comments?sortBy=oldest", alice),
+        ("/admin/comments?search=好看", alice),
+        ("/admin/stats", alice),
+    ]:
+        if path.endswith("cursor="):
+            page = ok(await client.get("/posts", params={"limit": 2}))
+            path += page.get("nextCursor") or ""
+        ok(await client.get(path, headers=auth))
+    
+    # 取消互动和删除
+    ok(await client.post(f"/posts/{post_id}/like", headers=bob))
+    ok(await client.post(f"/posts/{post_id}/favorite", headers=carol))
+    ok(await client.post(f"/users/{bob_id}/follow", headers=alice))
+    ok(await client.delete(f"/comments/{comment['id']}", headers=carol))
+    ok(await client.delete(f"/posts/{post_ids[4]}", headers=alice))
+
+
+def full_scans(plan: list[tuple]) -> list[str]:
+    """执行计划中未使用索引的整表扫描（不含子查询结果和允许扫描的表）"""
+    tables = set(Base.metadata.tables)
+    scans = []
+    for row in plan:
+        match = _FULL_SCAN.match(row[3])
+        if match and match.group(1) in tables and match.group(1) not in ALLOWED_SCANS:
+            scans.append(row[3])
+    return scans
+
+
+@pytest.mark.skipif(engine.url.get_backend_name() != "sqlite", reason="EXPLAIN QUERY PLAN 仅适用于 SQLite")
+def test_routes_use_indexes(run_api):
+    """接口执行的查询均不存在全表扫描"""
+    recorder = QueryRecorder()
+    recorder.attach()
+    try:
+        run_api(exercise_routes)
+    finally:
+        recorder.detach()
+    assert recorder.statements
+    
+    failures = []
+    with sqlite3.connect(engine.url.database) as conn:
+        for statement, parameters in recorder.statements.items():
+            plan = conn.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            flat = " ".join(statement.split())
+            if any(pattern.search(flat) for pattern in ALLOWED_STATEMENTS):
+                continue
+            if full_scans(plan):
+                failures.append("\n".join([flat, *(f"    {row[3]}" for row in plan)]))
+    
+    assert not failures, "存在全表扫描的查询:\n" + "\n".join(failures)
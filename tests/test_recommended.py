@@ -0,0 +1,28 @@
+"""
+推荐帖子测试
+"""
+from tests.conftest import ok, register
+
+
+def test_page_mode_keeps_domain(run_api):
+    """按页码翻页时传回第一页的 seed 和 domain，中途发帖不会改变后续页"""
+    async def scenario(client):
+        author = await register(client, "recommend_author")
+        for i in range(6):
+            ok(await client.post("/posts", json={"title": f"推荐 {i}", "content": "正文"}, headers=author))
+        
+        first = ok(await client.get("/posts/recommended", params={"limit": 3, "seed": 7}))
+        new_id = ok(await client.post("/posts", json={"title": "新帖", "content": "正文"}, headers=author))["id"]
+        assert new_id > first["domain"]
+        
+        params = {"limit": 3, "seed": first["seed"], "domain": first["domain"]}
+        seen = [item["id"] for item in first["items"]]
+        for page in range(2, first["domain"] // 3 + 2):
+            data = ok(await client.get("/posts/recommended", params={**params, "page": page}))
+            assert data["domain"] == first["domain"]
+            seen += [item["id"] for item in data["items"]]
+        
+        assert new_id not in seen
+        assert len(seen) == len(set(seen))
+    
+    run_api(scenario)
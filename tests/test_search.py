@@ -0,0 +1,56 @@
+"""
+全文搜索测试
+"""
+from app.services.search import build_match_query
+from tests.conftest import ok, register
+
+
+def test_latin_terms_are_prefix_queries():
+    """非CJK单词使用前缀匹配，CJK关键词转换为二元组短语"""
+    assert build_match_query("hel") == '"hel"*'
+    assert build_match_query('say "hi"') == '"say"* "hi"*'
+    assert build_match_query("芙莉莲") == '"芙莉 莉莲"'
+    assert build_match_query("re:ゼロ") == '"re"* "ゼロ"'
+    assert build_match_query("   ") is None
+
+
+def test_search_matches_latin_prefix(run_api):
+    """搜索单词前缀能找到包含完整单词的帖子"""
+    async def scenario(client):
+        author = await register(client, "search_author")
+        post_id = ok(await client.post(
+            "/posts",
+            json={"title": "Hello FastAPI", "content": "葬送的芙莉莲 Frieren"},
+            headers=author,
+        ))["id"]
+        
+        for keyword in ("hel", "Fast", "frier", "芙莉莲", "hello 芙莉"):
+            data = ok(await client.get("/posts/search", params={"keyword": keyword}))
+            assert post_id in [item["id"] for item in data["items"]], keyword
+        
+        data = ok(await client.get("/posts/search", params={"keyword": "ello"}))
+        assert post_id not in [item["id"] for item in data["items"]]
+    
+    run_api(scenario)
+
+
+def test_search_highlight_uses_full_content(run_api):
+    """关键词位于摘要之后时，列表模式的高亮片段仍从完整正文中截取"""
+    async def scenario(client):
+        author = await register(client, "snippet_author")
+        content = "填充文字" * 200 + " needle " + "结尾"
+        ok(await client.post(
+            "/posts",
+            json={"title": "长文", "content": content},
+            headers=author,
+        ))
+        
+        for full in ("false", "true"):
+            data = ok(await client.get(
+                "/posts/search", params={"keyword": "needle", "full": full}
+            ))
+            assert data["items"], full
+            assert "<mark>needle</mark>" in data["items"][0]["highlight"]["content"], full
+            assert ("excerpt" in data["items"][0]) == (full == "true")
+    
+    run_api(scenario)
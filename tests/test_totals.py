@@ -0,0 +1,21 @@
+"""
+总数计数测试
+"""
+from sqlalchemy import literal, select
+
+from app.core.database import AsyncSessionLocal
+from app.services.totals import _seed_total, get_total
+
+
+def test_seed_keeps_existing_row(run_api):
+    """计数行缺失时统计并写入；并发写入同一计数行时保留已有的值"""
+    async def scenario(client):
+        async with AsyncSessionLocal() as db:
+            assert await get_total(db, "test:seed", select(literal(5))) == 5
+            assert await _seed_total(db, "test:seed", select(literal(9))) == 5
+            await db.commit()
+        
+        async with AsyncSessionLocal() as db:
+            assert await get_total(db, "test:seed", select(literal(9))) == 5
+    
+    run_api(scenario)
@@ -0,0 +1,34 @@
+"""
+浏览量写缓冲测试
+"""
+import pytest
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal
+from app.models.post import Post
+from app.services.hot_rank import score_post
+from app.services.view_counter import view_buffer
+from tests.conftest import ok, register
+
+
+def test_flush_refreshes_hot_scores(run_api):
+    """写回浏览量时批量刷新各帖子的热度分"""
+    async def scenario(client):
+        author = await register(client, "views_author")
+        post_ids = [
+            ok(await client.post("/posts", json={"title": f"浏览 {i}", "content": "正文"}, headers=author))["id"]
+            for i in range(3)
+        ]
+        await view_buffer.flush()
+        for views, post_id in enumerate(post_ids, start=1):
+            view_buffer.record(post_id, views * 100)
+        assert await view_buffer.flush() == len(post_ids)
+        
+        async with AsyncSessionLocal() as db:
+            posts = (await db.execute(select(Post).where(Post.id.in_(post_ids)).order_by(Post.id))).scalars().all()
+        assert [post.view_count for post in posts] == [100, 200, 300]
+        for post in posts:
+            assert post.hot_score > 0
+            assert post.hot_score == pytest.approx(score_post(post), rel=1e-3)
+    
+    run_api(scenario)
@@ -0,0 +1,72 @@
+"""
+写入队列测试
+"""
+import asyncio
+from contextlib import suppress
+
+from app.api.routes.posts import toggle_post_like
+from app.core.write_queue import WriteQueue, write_queue
+from tests.conftest import ok, register
+
+
+def test_cached_feed_invalidated_after_batch_commit(run_api):
+    """批次提交前的匿名读取不能把旧数据留在缓存中"""
+    async def scenario(client):
+        author = await register(client, "wq_author")
+        fan = await register(client, "wq_fan")
+        fan_id = ok(await client.get("/auth/user", headers=fan))["id"]
+        post_id = ok(await client.post("/posts", json={"title": "写入队列", "content": "正文"}, headers=author))["id"]
+        
+        # 预热：写入缓存并初始化总数记录
+        assert (await client.get("/posts")).status_code == 200
+        
+        async def read_feed_mid_batch(db):
+            # 点赞的 SAVEPOINT 已释放、批次事务尚未提交
+            response = await client.get("/posts")
+            assert response.status_code == 200
+        
+        batches = write_queue.batches
+        await asyncio.gather(
+            write_queue.submit(lambda db: toggle_post_like(db, post_id, fan_id)),
+            write_queue.submit(read_feed_mid_batch),
+        )
+        assert write_queue.batches == batches + 1
+        
+        response = await client.get("/posts")
+        post = next(item for item in ok(response)["items"] if item["id"] == post_id)
+        assert post["likes"] == 1
+        assert ok(await client.get(f"/posts/{post_id}"))["likes"] == 1
+    
+    run_api(scenario)
+
+
+def test_cancelled_worker_finishes_in_flight_batch(run_api):
+    """关闭时取消后台任务，已出队的批次仍会完成，剩余操作由 drain 执行"""
+    async def scenario(client):
+        queue = WriteQueue(max_batch=10, max_pending=100)
+        worker = asyncio.create_task(queue.run_worker())
+        started, release = asyncio.Event(), asyncio.Event()
+        
+        async def slow(db):
+            started.set()
+            await release.wait()
+            return "slow"
+        
+        async def quick(db):
+            return "quick"
+        
+        first = asyncio.create_task(queue.submit(slow))
+        await started.wait()
+        second = asyncio.create_task(queue.submit(quick))
+        await asyncio.sleep(0)
+        
+        worker.cancel()
+        with suppress(asyncio.CancelledError):
+            await worker
+        release.set()
+        await queue.drain()
+        
+        assert await asyncio.wait_for(first, 1) == "slow"
+        assert await asyncio.wait_for(second, 1) == "quick"
+    
+    run_api(scenario)